@@ -0,0 +1,147 @@
+import os
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import h5py
+
+from simulation_package.files import find_dir, find_retrieval
+from simulation_package.hdf import COMPRESSED, CONTIGUOUS, read_hdf5, write_dataset
+from simulation_package.ycalc import ForwardModel
+
+
+def bench_jacobian(zenith=77.6, azimuth=0, line="kimra", zeeman=True) -> dict:
+    """Benchmark of ycalc with and without the temperature Jacobian
+
+    Runs one line of sight with and without the Jacobian, without the
+    result cache, and compares the yCalc time and the size of the
+    saved file
+
+    Args:
+        zenith: Zenith angle
+        azimuth: Azimuth angle
+        line: Name of the line
+        zeeman: Boolean if Zeeman splitting should be used
+
+    Returns:
+        Dictionary with time in s and file size in bytes for both cases
+    """
+    savepath = find_dir(dirname="simulation")
+    results = {}
+
+    for jacobian in (True, False):
+        name = "jacobian" if jacobian else "no_jacobian"
+        filename = f"benchmark_{name}.hdf5"
+
+        session = ForwardModel(line=line, zeeman=zeeman, jacobian=jacobian)
+        session.setup()  # outside of the timing
+        t0 = time.perf_counter()
+        stokes = session.compute(zenith=zenith, azimuth=azimuth)
+        dt = time.perf_counter() - t0
+        session.save(zenith, azimuth, stokes, filename)
+
+        size = os.path.getsize(savepath / filename)
+        os.remove(savepath / filename)
+        results[name] = {"time": dt, "size": size}
+        print(f"{name:>12}: yCalc {dt:8.2f} s, file {size / 1024**2:8.2f} MB")
+
+    speedup = results["jacobian"]["time"] / results["no_jacobian"]["time"]
+    shrink = results["jacobian"]["size"] / results["no_jacobian"]["size"]
+    print(f"without Jacobian: {speedup:.1f}x faster, {shrink:.1f}x smaller files")
+    return results
+
+
+def _read_peak_rss(filename, lazy: bool, keys: tuple) -> tuple[float, int]:
+    t0 = time.perf_counter()
+    data = read_hdf5(filename, lazy=lazy)
+    for key in keys:
+        data[key].sum()
+    dt = time.perf_counter() - t0
+    # ru_maxrss is in kB on Linux
+    return dt, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def bench_read(name="234GHz_zeeman.hdf5", keys=("f_grid", "y", "yf")) -> dict:
+    """Benchmark of eager and lazy reading of a retrieval file
+
+    Reads the datasets used by the spectrum plots with read_hdf5 and
+    with LazyHDF5. Each case runs in a new process so the peak
+    resident memory is not shared between them
+
+    Args:
+        name: Name of the retrieval file
+        keys: Datasets to access
+
+    Returns:
+        Dictionary with time in s and peak RSS in bytes for both cases
+    """
+    filename = find_retrieval(name=name)
+    results = {}
+
+    for lazy in (False, True):
+        label = "lazy" if lazy else "eager"
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            dt, rss = executor.submit(_read_peak_rss, filename, lazy, tuple(keys)).result()
+        results[label] = {"time": dt, "peak_rss": rss}
+        print(f"{label:>12}: read {dt * 1e3:8.2f} ms, peak RSS {rss / 1024**2:8.2f} MB")
+
+    shrink = results["eager"]["peak_rss"] / results["lazy"]["peak_rss"]
+    print(f"lazy reading: {shrink:.1f}x lower peak RSS")
+    return results
+
+
+OUTPUT_POLICIES = {
+    "contiguous": CONTIGUOUS,
+    "gzip": COMPRESSED._replace(float32=()),
+    "gzip_float32": COMPRESSED,
+    "lzf_float32": COMPRESSED._replace(compression="lzf", level=None),
+}
+
+
+def bench_output(name="234GHz_zeeman.hdf5", policies: dict = None) -> dict:
+    """Benchmark of the HDF5 output policies
+
+    Writes all datasets of a retrieval file with each policy and
+    compares the write time, the time to read everything back and the
+    file size
+
+    Args:
+        name: Name of the retrieval file
+        policies: Dictionary with OutputPolicy per label, OUTPUT_POLICIES
+            if not given
+
+    Returns:
+        Dictionary with write time and read time in s and file size in
+        bytes per policy
+    """
+    policies = OUTPUT_POLICIES if policies is None else policies
+    data = read_hdf5(find_retrieval(name=name))
+    savepath = find_dir(dirname="simulation")
+    results = {}
+
+    for label, policy in policies.items():
+        filename = savepath / f"benchmark_{label}.hdf5"
+
+        t0 = time.perf_counter()
+        with h5py.File(filename, "w") as file:
+            for key, value in data.items():
+                write_dataset(file, key, value, policy)
+        write = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        read_hdf5(filename)
+        read = time.perf_counter() - t0
+
+        size = os.path.getsize(filename)
+        os.remove(filename)
+        results[label] = {"write": write, "read": read, "size": size}
+        print(f"{label:>14}: write {write * 1e3:8.2f} ms, read {read * 1e3:8.2f} ms, file {size / 1024**2:8.2f} MB")
+
+    return results
+
+
+BENCHMARKS = {
+    "jacobian": bench_jacobian,
+    "read": bench_read,
+    "output": bench_output,
+}
@@ -0,0 +1,159 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from simulation_package.files import find_dir
+
+
+def file_hash(path) -> str:
+    """Function to hash a file
+
+    ARTS binary XML files keep their data in a '.bin' file next to
+    the '.xml' file, so that file is included when it exists
+
+    Args:
+        path: Path to the file
+
+    Returns:
+        Hex digest of the file content
+    """
+    digest = hashlib.sha256()
+    for p in (Path(path), Path(f"{path}.bin")):
+        if p.exists():
+            with open(p, "rb") as file:
+                for block in iter(lambda: file.read(1 << 20), b""):
+                    digest.update(block)
+    return digest.hexdigest()
+
+
+def make_key(**inputs) -> str:
+    """Function to make a cache key
+
+    Hashes the name, type, shape and content of every input, so two
+    keys are only equal if all inputs are equal
+
+    Args:
+        inputs: Inputs that affect the cached result
+
+    Returns:
+        Hex digest of the inputs
+    """
+    digest = hashlib.sha256()
+    for name in sorted(inputs):
+        value = inputs[name]
+        digest.update(name.encode())
+        if isinstance(value, (str, bytes)) or not hasattr(value, "__array__"):
+            digest.update(repr(value).encode())
+        else:
+            array = np.ascontiguousarray(np.asarray(value))
+            digest.update(f"{array.dtype.str}{array.shape}".encode())
+            digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Class for an on-disk cache of computed arrays
+
+    Every entry is a '.npz' file named after its key. The modification
+    time of an entry is updated on every hit, and the least recently
+    used entries are removed when the cache grows above 'max_bytes'.
+    The size of the cache is counted once and then kept up to date by
+    'put', so the directory is only scanned again when the count goes
+    above 'max_bytes'
+
+    Args:
+        directory: Directory of the cache, 'data/cache/results' if not given
+        max_bytes: Size cap of the cache in bytes
+    """
+
+    def __init__(self, directory=None, max_bytes=2 * 1024**3):
+        if directory is None:
+            directory = find_dir(dirname="cache/results")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.total = None
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}.npz"
+
+    def get(self, key: str) -> dict | None:
+        """Get an entry
+
+        Args:
+            key: Key from 'make_key'
+
+        Returns:
+            Dictionary with the stored arrays or None if there is no entry
+        """
+        path = self.path(key)
+        try:
+            with np.load(path) as data:
+                entry = {name: data[name] for name in data.files}
+        except (FileNotFoundError, OSError, ValueError):
+            self.misses += 1
+            return None
+
+        os.utime(path)
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, **arrays) -> None:
+        """Store an entry and evict old entries if needed
+
+        Args:
+            key: Key from 'make_key'
+            arrays: Arrays to store
+        """
+        path = self.path(key)
+        try:
+            replaced = path.stat().st_size
+        except FileNotFoundError:
+            replaced = 0
+
+        # write to a temporary file first so readers never see partial entries
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as file:
+            np.savez(file, **arrays)
+        added = os.path.getsize(tmp)
+        os.replace(tmp, path)
+
+        # other processes may add entries too, so the count is a lower bound
+        # that is corrected by the scan in 'evict'
+        self.total = self.size() if self.total is None else self.total + added - replaced
+        if self.total > self.max_bytes:
+            self.evict()
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until the cache fits in 'max_bytes'"""
+        entries = []
+        for path in self.directory.glob("*.npz"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+        self.total = total
+
+    def size(self) -> int:
+        return sum(path.stat().st_size for path in self.directory.glob("*.npz"))
+
+    def report(self) -> str:
+        lookups = self.hits + self.misses
+        rate = 100 * self.hits / lookups if lookups else 0
+        return (
+            f"cache {self.directory}: {self.hits} hits, {self.misses} misses ({rate:.0f}% hit rate), "
+            f"{self.size() / 1024**2:.1f} of {self.max_bytes / 1024**2:.0f} MB used"
+        )
@@ -0,0 +1,127 @@
+import json
+import os
+from pathlib import Path
+
+from simulation_package.cache import make_key
+from simulation_package.files import find_assets
+
+# subsets written before this was recorded may be copies of window limited line files
+SOURCE = "split_catalogue"
+
+
+def catalogue_version(catalogue_directory: str) -> str:
+    """Function to get the version of the ARTS line catalogue
+
+    Args:
+        catalogue_directory: Path to 'arts-cat-data-<version>'
+
+    Returns:
+        Version of the catalogue
+    """
+    return Path(catalogue_directory).name.removeprefix("arts-cat-data-")
+
+
+def subset_path(species: list[str], version: str) -> Path:
+    """Function to get the path of a line catalogue subset
+
+    The species tags carry the frequency window, so the subset is
+    keyed by the species list and the catalogue version
+
+    Args:
+        species: Absorption species tags
+        version: Version of the ARTS line catalogue
+
+    Returns:
+        Path to the subset in 'assets/abs_lines_per_species/cache'
+    """
+    key = make_key(kind="lines", species=list(species), version=version)
+    return find_assets(dirname="abs_lines_per_species/cache") / f"{key}.xml"
+
+
+def _manifest_path(path: Path) -> Path:
+    return path.with_suffix(".json")
+
+
+def _file_sizes(path: Path) -> dict:
+    return {p.name: p.stat().st_size for p in (path, Path(f"{path}.bin")) if p.exists()}
+
+
+def is_valid(path: Path, species: list[str], version: str) -> bool:
+    """Function to check a subset without reading it
+
+    The subset is valid if its manifest was written for the same
+    species and catalogue version, the lines were read from the split
+    catalogue and the file sizes are unchanged
+
+    Args:
+        path: Path to the subset
+        species: Absorption species tags
+        version: Version of the ARTS line catalogue
+
+    Returns:
+        Boolean if the subset can be used
+    """
+    try:
+        with open(_manifest_path(path), "r") as file:
+            manifest = json.load(file)
+        sizes = _file_sizes(path)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return False
+
+    return (
+        manifest.get("species") == list(species)
+        and manifest.get("version") == version
+        and manifest.get("source") == SOURCE
+        and manifest.get("sizes") == sizes
+        and path.name in sizes
+    )
+
+
+def _write_manifest(path: Path, species: list[str], version: str) -> None:
+    manifest = {"species": list(species), "version": version, "source": SOURCE, "sizes": _file_sizes(path)}
+    tmp = _manifest_path(path).with_suffix(f".{os.getpid()}.json.tmp")
+    with open(tmp, "w") as file:
+        json.dump(manifest, file, indent=1)
+    os.replace(tmp, _manifest_path(path))
+
+
+def load_lines(ws, species: list[str], catalogue_directory: str, refresh: bool = False) -> Path:
+    """Function to load the lines of a species list into a workspace
+
+    Reads the subset for the species list from the cache when it is
+    valid. Otherwise the subset is read from the full split catalogue
+    and stored in the cache as binary ARTS XML. The abs_species of the
+    workspace must already be set to 'species'
+
+    Args:
+        ws: ARTS workspace
+        species: Absorption species tags
+        catalogue_directory: Path to 'arts-cat-data-<version>'
+        refresh: Boolean if the subset should be read from the catalogue
+            even if the cache is valid
+
+    Returns:
+        Path to the subset
+    """
+    version = catalogue_version(catalogue_directory)
+    path = subset_path(species, version)
+
+    if not refresh and is_valid(path, species, version):
+        ws.ReadXML(ws.abs_lines_per_species, str(path))
+        return path
+
+    print(f"Reading lines for {len(species)} species from the catalogue")
+    ws.abs_lines_per_speciesReadSpeciesSplitCatalog(basename=f"{catalogue_directory}/lines/")
+
+    # other workers may read the subset, so it is moved in place when complete
+    tmp = path.with_name(f"{path.stem}.{os.getpid()}.tmp.xml")
+    ws.WriteXML(
+        output_file_format="binary",
+        input=ws.abs_lines_per_species,
+        filename=str(tmp),
+    )
+    if os.path.exists(f"{tmp}.bin"):
+        os.replace(f"{tmp}.bin", f"{path}.bin")
+    os.replace(tmp, path)
+    _write_manifest(path, species, version)
+    return path
@@ -1,6 +1,12 @@
 import argparse
 from simulation_package.ret import ret
 from simulation_package.yc import yc
+from simulation_package.sweep import sweep
+from simulation_package.benchmarks import BENCHMARKS
+from simulation_package.profiles import build_profile_store
+from simulation_package.measurements import MeasurementCatalogue
+from simulation_package.timeseries import timeseries_retrieval
+from simulation_package.montecarlo import montecarlo
 from simulation_package.meas_yc_plot import meas_plot, mag_plot, meas_sim_comparison
 from simulation_package.ret_plots import spec_and_fit_plot, jac_plot
 
@@ -10,6 +16,12 @@ PLOTTING = {""}
 DESC = {
     "ycalc": "Perform ycalc of 233.95 GHz O2 line at azi = [0, 90, 180, 270] and za = 77.6",
     "retrieval": "Perform synttich retrieval of 233.95 GHz O2 line",
+    "sweep": "Perform ycalc over the Cartesian product of the axes in a sweep specification",
+    "benchmark": "Run a performance benchmark",
+    "profiles": "Build the atmospheric profile store from ECMWF XML files",
+    "measurements": "Index the RPG FFTS measurement files and list them",
+    "timeseries": "Retrieve temperature from every measurement in a time range",
+    "montecarlo": "Retrieve one simulated state with many seeded noise realisations",
 }
 
 
@@ -22,24 +34,85 @@ def cli():
         desc = DESC[name]
         subparser = subparsers.add_parser(name, help=desc, description=desc)
         subparser.add_argument("--plot", action="store_true")
+        subparser.add_argument(
+            "--jobs",
+            type=int,
+            default=1,
+            help="Number of worker processes (default: 1)",
+        )
+        subparser.add_argument(
+            "--lookup",
+            action="store_true",
+            help="Use an absorption lookup table for the species without Zeeman splitting",
+        )
+
+    subparser = subparsers.add_parser("sweep", help=DESC["sweep"], description=DESC["sweep"])
+    subparser.add_argument("spec", help="JSON file with the sweep axes")
+    subparser.add_argument("--output", default="results.hdf5", help="Name of the result store")
+    subparser.add_argument("--jobs", type=int, default=1, help="Number of worker processes (default: 1)")
+
+    subparser = subparsers.add_parser("benchmark", help=DESC["benchmark"], description=DESC["benchmark"])
+    subparser.add_argument("name", choices=BENCHMARKS.keys())
+
+    subparser = subparsers.add_parser("profiles", help=DESC["profiles"], description=DESC["profiles"])
+    subparser.add_argument("--source", default=None, help="Directory with the XML files (default: assets/grids)")
+
+    subparser = subparsers.add_parser("measurements", help=DESC["measurements"], description=DESC["measurements"])
+    subparser.add_argument("--start", default=None, help="First time, ISO format")
+    subparser.add_argument("--end", default=None, help="Last time, ISO format")
+    subparser.add_argument("--azimuth", type=float, default=None, help="Azimuth angle in deg")
+
+    subparser = subparsers.add_parser("timeseries", help=DESC["timeseries"], description=DESC["timeseries"])
+    subparser.add_argument("--line", default="kimra", choices=["kimra", "tempera"])
+    subparser.add_argument("--start", default=None, help="First time, ISO format")
+    subparser.add_argument("--end", default=None, help="Last time, ISO format")
+    subparser.add_argument("--output", default="results.hdf5", help="Name of the result store")
+    subparser.add_argument("--jobs", type=int, default=1, help="Number of worker processes (default: 1)")
+
+    subparser = subparsers.add_parser("montecarlo", help=DESC["montecarlo"], description=DESC["montecarlo"])
+    subparser.add_argument("--line", default="kimra", choices=["kimra", "tempera"])
+    subparser.add_argument("--members", type=int, default=200, help="Number of noise realisations (default: 200)")
+    subparser.add_argument("--seed", type=int, default=0, help="Seed of the noise streams (default: 0)")
+    subparser.add_argument("--jobs", type=int, default=1, help="Number of worker processes (default: 1)")
 
     args = parser.parse_args()
-    script = COMMANDS[args.command]
 
     match args.command:
         case "ycalc":
-            script()
+            yc(jobs=args.jobs, lookup=args.lookup)
             if args.plot:
                 mag_plot()
                 meas_plot()
                 meas_sim_comparison()
 
         case "retrieval":
-            script()
+            ret(jobs=args.jobs, lookup=args.lookup)
             if args.plot:
                 spec_and_fit_plot()
                 jac_plot()
 
+        case "sweep":
+            sweep(spec=args.spec, filename=args.output, jobs=args.jobs)
+
+        case "benchmark":
+            BENCHMARKS[args.name]()
+
+        case "profiles":
+            build_profile_store(source=args.source)
+
+        case "measurements":
+            catalogue = MeasurementCatalogue()
+            for entry in catalogue.query(start=args.start, end=args.end, azimuth=args.azimuth):
+                print(f"{entry['time']}  azi {entry['azimuth']:7.1f}  za {entry['za']:5.1f}  {entry['path']}")
+
+        case "timeseries":
+            timeseries_retrieval(
+                line=args.line, start=args.start, end=args.end, filename=args.output, jobs=args.jobs
+            )
+
+        case "montecarlo":
+            montecarlo(n=args.members, line=args.line, seed=args.seed, jobs=args.jobs)
+
 
 if __name__ == "__main__":
     cli()
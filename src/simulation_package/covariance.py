@@ -0,0 +1,160 @@
+import numpy as np
+from scipy import sparse
+
+
+def _sigma(variance, n: int) -> np.ndarray:
+    return np.sqrt(np.broadcast_to(np.asarray(variance, dtype=float), (n,)))
+
+
+def _size(variance: np.ndarray, n: int | None) -> int:
+    if variance.ndim:
+        return len(variance)
+    if n is None:
+        raise ValueError("The size 'n' is needed if 'variance' is a scalar")
+    return n
+
+
+def diagonal(variance, n: int | None = None) -> sparse.csr_matrix:
+    """Function to make a diagonal covariance matrix
+
+    Args:
+        variance: Variance, one for all elements or one per element
+        n: Size of the matrix if 'variance' is a scalar
+
+    Returns:
+        Covariance matrix
+
+    Raises:
+        ValueError: Raised if 'variance' is a scalar and 'n' is not given
+    """
+    variance = np.asarray(variance, dtype=float)
+    variance = np.broadcast_to(variance, (_size(variance, n),))
+    return sparse.diags(variance, format="csr")
+
+
+def banded(variance, correlations, n: int | None = None) -> sparse.csr_matrix:
+    """Function to make a banded covariance matrix
+
+    S_ij = sqrt(v_i v_j) c_|i-j| for 0 < |i - j| <= len(correlations)
+
+    Args:
+        variance: Variance, one for all elements or one per element
+        correlations: Correlation of the first, second, ... neighbour
+        n: Size of the matrix if 'variance' is a scalar
+
+    Returns:
+        Covariance matrix
+
+    Raises:
+        ValueError: Raised if 'variance' is a scalar and 'n' is not given
+    """
+    variance = np.asarray(variance, dtype=float)
+    n = _size(variance, n)
+    sigma = _sigma(variance, n)
+
+    diagonals, offsets = [sigma**2], [0]
+    for k, c in enumerate(correlations, start=1):
+        band = c * sigma[:-k] * sigma[k:]
+        diagonals += [band, band]
+        offsets += [k, -k]
+    return sparse.diags(diagonals, offsets, shape=(n, n), format="csr")
+
+
+def exponential(z, variance, corr_length: float, cutoff: float = 0.0) -> sparse.csr_matrix:
+    """Function to make an exponentially correlated covariance matrix
+
+    S_ij = sqrt(v_i v_j) exp(-|z_i - z_j| / corr_length)
+
+    Only the diagonals that hold a correlation above 'cutoff' are
+    built, so a cutoff gives a banded matrix. With the default cutoff
+    of 0 every diagonal is kept and the matrix is full, which is the
+    matrix that 'exponential_inverse' inverts exactly. A banded matrix
+    is not the inverse of that tridiagonal matrix, so use a cutoff only
+    when the inverse is computed from the banded matrix itself
+
+    Args:
+        z: Altitudes of the elements, monotonic
+        variance: Variance, one for all elements or one per element
+        corr_length: Correlation length, same unit as 'z'
+        cutoff: Smallest correlation that is kept
+
+    Returns:
+        Covariance matrix
+    """
+    z = np.asarray(z, dtype=float)
+    n = len(z)
+    sigma = _sigma(variance, n)
+
+    diagonals, offsets = [sigma**2], [0]
+    for k in range(1, n):
+        correlation = np.exp(-np.abs(z[k:] - z[:-k]) / corr_length)
+        if correlation.max() <= cutoff:
+            break
+        band = np.where(correlation > cutoff, correlation, 0) * sigma[:-k] * sigma[k:]
+        diagonals += [band, band]
+        offsets += [k, -k]
+    return sparse.diags(diagonals, offsets, shape=(n, n), format="csr")
+
+
+def exponential_inverse(z, variance, corr_length: float) -> sparse.csr_matrix:
+    """Function to make the inverse of an exponential covariance matrix
+
+    The exponential correlation on a monotonic grid is a first order
+    Markov process, so the exact inverse of the full matrix from
+    'exponential' is tridiagonal. It is only the inverse of
+    'exponential' with cutoff=0, the banded matrices of a larger cutoff
+    have a different inverse
+
+    Args:
+        z: Altitudes of the elements, monotonic
+        variance: Variance, one for all elements or one per element
+        corr_length: Correlation length, same unit as 'z'
+
+    Returns:
+        Inverse of the covariance matrix
+
+    Raises:
+        ValueError: Raised if 'z' is not strictly monotonic
+    """
+    z = np.asarray(z, dtype=float)
+    dz = np.diff(z)
+    if not (np.all(dz > 0) or np.all(dz < 0)):
+        raise ValueError("The altitudes must be strictly monotonic")
+
+    a = np.exp(-np.abs(dz) / corr_length)
+    b = a**2 / (1 - a**2)
+    main = np.ones(len(z))
+    main[:-1] += b
+    main[1:] += b
+    off = -a / (1 - a**2)
+
+    scale = 1 / _sigma(variance, len(z))
+    inverse = sparse.diags([main, off, off], [0, 1, -1], format="csr")
+    return sparse.diags(scale) @ inverse @ sparse.diags(scale)
+
+
+def dense(matrix) -> np.ndarray:
+    """Function to get a covariance matrix as a dense array
+
+    Args:
+        matrix: Sparse or dense matrix
+
+    Returns:
+        Dense matrix
+    """
+    return matrix.toarray() if sparse.issparse(matrix) else np.asarray(matrix, dtype=float)
+
+
+def to_arts(matrix):
+    """Function to convert a sparse matrix for ARTS
+
+    Args:
+        matrix: Sparse matrix
+
+    Returns:
+        ARTS Sparse, for covmat_seSet, retrievalAddTemperature and covmat_sxAddBlock
+    """
+    # only the conversion needs ARTS, the builders are also used without it
+    import pyarts
+
+    return pyarts.arts.Sparse(sparse.csr_matrix(matrix))
@@ -0,0 +1,147 @@
+from typing import Iterator
+
+import h5py
+import numpy as np
+
+from simulation_package.covariance import dense
+from simulation_package.files import find_dir
+from simulation_package.parallel import iter_jobs, report_job
+
+
+def _factor(covariance: np.ndarray) -> np.ndarray:
+    try:
+        return np.linalg.cholesky(covariance)
+    except np.linalg.LinAlgError:
+        # positive semi-definite, e.g. a correlation length much longer than the grid
+        w, v = np.linalg.eigh(covariance)
+        return v * np.sqrt(np.clip(w, 0, None))
+
+
+def temperature_ensemble(mean, covariance, n: int, seed=None) -> np.ndarray:
+    """Function to draw perturbed temperature profiles
+
+    Args:
+        mean: Unperturbed temperature profile
+        covariance: Covariance of the perturbations, see 'covariance'
+        n: Number of profiles
+        seed: Seed of the random number generator
+
+    Returns:
+        Array of shape (n, plen)
+    """
+    return next(ensemble_batches(mean, covariance, n, batch_size=n, seed=seed))
+
+
+def ensemble_batches(mean, covariance, n: int, batch_size: int, seed=None) -> Iterator[np.ndarray]:
+    """Function to draw perturbed temperature profiles in batches
+
+    The covariance is factorised once and every batch is one matrix
+    product. The batches are drawn in order from one generator, so the
+    profiles do not depend on 'batch_size'
+
+    Args:
+        mean: Unperturbed temperature profile
+        covariance: Covariance of the perturbations, see 'covariance'
+        n: Number of profiles
+        batch_size: Number of profiles per batch
+        seed: Seed of the random number generator
+
+    Yields:
+        Arrays of shape (batch_size, plen), the last one may be smaller
+    """
+    mean = np.asarray(mean, dtype=float)
+    factor = _factor(dense(covariance))
+    rng = np.random.default_rng(seed)
+
+    for start in range(0, n, batch_size):
+        size = min(batch_size, n - start)
+        yield mean + rng.standard_normal((size, len(mean))) @ factor.T
+
+
+def _ensemble_job(profiles, los, line, zeeman, time):
+    # ARTS is imported here, drawing the profiles does not need it
+    from simulation_package.ycalc import ForwardModel
+
+    session = ForwardModel(line=line, zeeman=zeeman, time=time, jacobian=False)
+    spectra = []
+    for profile in profiles:
+        session.set_temperature(profile)
+        spectra.append([session.flatten(stokes) for stokes, _ in session.compute_batch(los)])
+    return profiles, np.array(spectra)
+
+
+def run_ensemble(
+    covariance,
+    n: int,
+    los,
+    filename: str = "ensemble.hdf5",
+    line: str = "kimra",
+    zeeman: bool = True,
+    time: str = "2024-01-04 19:00:00",
+    seed=None,
+    batch_size: int = 32,
+    jobs: int = 1,
+):
+    """Function to run forward models for a temperature ensemble
+
+    Every batch of profiles is one job that keeps one forward model
+    session and only swaps the temperature between members. The
+    batches are drawn when a worker is free, so only a few batches are
+    in memory at a time. The results are written to 'filename' as
+    batches finish, with the profiles in 'temperature' and the spectra
+    in 'y' of shape (n, nlos, ny)
+
+    Args:
+        covariance: Covariance of the perturbations, see 'covariance'
+        n: Number of members
+        los: Array with (zenith, azimuth) pairs
+        filename: Save name of the data
+        line: Name of the line
+        zeeman: Boolean if Zeeman splitting should be used
+        time: Time used for the IGRF magnetic field
+        seed: Seed of the random number generator
+        batch_size: Number of members per job
+        jobs: Number of worker processes
+
+    Returns:
+        Path to the saved data
+    """
+    from simulation_package.make_grids import make_atm_grids
+
+    los = np.atleast_2d(np.asarray(los, dtype=float))
+    mean = make_atm_grids(start=0).temperature
+    tasks = (
+        (f"batch_{i}", {"profiles": profiles, "los": los, "line": line, "zeeman": zeeman, "time": time})
+        for i, profiles in enumerate(ensemble_batches(mean, covariance, n, batch_size, seed))
+    )
+
+    path = find_dir(dirname="simulation") / filename
+    size = 0
+    with h5py.File(path, "w") as file:
+        file["los"] = los
+        file["mean"] = mean
+        file["covariance"] = dense(covariance)
+        file["seed"] = -1 if seed is None else seed
+
+        for name, ok, value in iter_jobs(_ensemble_job, tasks, workers=jobs, total=-(-n // batch_size)):
+            report_job(name, ok, value)
+            if not ok:
+                continue
+            profiles, spectra = value
+            if "y" not in file:
+                file.create_dataset("temperature", shape=(0, len(mean)), maxshape=(None, len(mean)), dtype="f8")
+                file.create_dataset(
+                    "y",
+                    shape=(0,) + spectra.shape[1:],
+                    maxshape=(None,) + spectra.shape[1:],
+                    chunks=(1,) + spectra.shape[1:],
+                    dtype="f8",
+                )
+            for key, data in (("temperature", profiles), ("y", spectra)):
+                file[key].resize(size + len(data), axis=0)
+                file[key][size:] = data
+            size += len(profiles)
+            file.flush()
+
+    print(f"Saved {size} of {n} ensemble members in {path}")
+    return path
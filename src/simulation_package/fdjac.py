@@ -0,0 +1,146 @@
+import h5py
+import numpy as np
+
+from simulation_package.cache import ResultCache
+from simulation_package.files import find_dir
+from simulation_package.make_grids import make_atm_grids
+from simulation_package.parallel import run_jobs
+from simulation_package.ycalc import ForwardModel
+
+
+def _spectra(line, zeeman, los, time, perturbations):
+    # one session for all perturbations, only the temperature changes
+    session = ForwardModel(line=line, zeeman=zeeman, time=time, cache=ResultCache(), jacobian=False)
+    base = np.array(session.grids.temperature)
+
+    spectra = {}
+    for name, index, delta in perturbations:
+        temperature = base.copy()
+        if index is not None:
+            temperature[index] += delta
+        session.set_temperature(temperature)
+        spectra[name] = np.array([session.flatten(stokes) for stokes, _ in session.compute_batch(los)])
+    return spectra
+
+
+def fd_jacobian(
+    los,
+    line="kimra",
+    zeeman=True,
+    levels=None,
+    step=1.0,
+    central=False,
+    time="2024-01-04 19:00:00",
+    jobs=1,
+) -> dict:
+    """Function to compute a finite-difference temperature Jacobian
+
+    Every selected level is perturbed by its step. The perturbations
+    are split into one part per worker, and every worker runs its part
+    in one forward model session that only replaces the temperature.
+    The altitudes are not updated by hydrostatic equilibrium, so the
+    result is comparable with 'analytic_jacobian' with hse=False
+
+    Args:
+        los: Array with (zenith, azimuth) pairs
+        line: Name of the line
+        zeeman: Boolean if Zeeman splitting should be used
+        levels: Indexes of the levels to perturb, all levels if None
+        step: Step size in K, one for all levels or one per level
+        central: Boolean if central instead of forward differences
+            should be used
+        time: Time used for the IGRF magnetic field
+        jobs: Number of worker processes
+
+    Returns:
+        Dictionary with the Jacobian of shape (nlos, ny, nlevels),
+        the levels and the steps
+    """
+    los = np.atleast_2d(np.asarray(los, dtype=float))
+    if levels is None:
+        levels = np.arange(make_atm_grids(start=0).plen)
+    levels = np.asarray(levels, dtype=int)
+    steps = np.broadcast_to(np.asarray(step, dtype=float), levels.shape)
+
+    perturbations = [] if central else [("base", None, 0.0)]
+    for level, h in zip(levels, steps):
+        perturbations.append((f"level_{level}_plus", int(level), float(h)))
+        if central:
+            perturbations.append((f"level_{level}_minus", int(level), -float(h)))
+
+    parts = np.array_split(np.arange(len(perturbations)), max(min(jobs, len(perturbations)), 1))
+    common = {"line": line, "zeeman": zeeman, "los": los, "time": time}
+    tasks = {
+        f"part_{i}": {**common, "perturbations": [perturbations[j] for j in part]} for i, part in enumerate(parts)
+    }
+
+    spectra = {}
+    for part in run_jobs(_spectra, tasks, workers=jobs).values():
+        spectra.update(part)
+
+    columns = []
+    for level, h in zip(levels, steps):
+        if central:
+            columns.append((spectra[f"level_{level}_plus"] - spectra[f"level_{level}_minus"]) / (2 * h))
+        else:
+            columns.append((spectra[f"level_{level}_plus"] - spectra["base"]) / h)
+
+    return {"jacobian": np.stack(columns, axis=-1), "levels": levels, "steps": np.array(steps)}
+
+
+def analytic_jacobian(los, line="kimra", zeeman=True, time="2024-01-04 19:00:00", hse=False) -> np.ndarray:
+    """Function to compute the ARTS temperature Jacobian
+
+    Args:
+        los: Array with (zenith, azimuth) pairs
+        line: Name of the line
+        zeeman: Boolean if Zeeman splitting should be used
+        time: Time used for the IGRF magnetic field
+        hse: Boolean if the Jacobian should include hydrostatic
+            equilibrium, off to match 'fd_jacobian'
+
+    Returns:
+        Jacobian of shape (nlos, ny, plen)
+    """
+    session = ForwardModel(line=line, zeeman=zeeman, time=time, cache=ResultCache(), jacobian=True, hse=hse)
+    return np.array([jacobian for _, jacobian in session.compute_batch(los)])
+
+
+def compare_jacobians(fd: dict, analytic: np.ndarray) -> dict:
+    """Function to compare a finite-difference and an analytic Jacobian
+
+    Args:
+        fd: Result of 'fd_jacobian'
+        analytic: Result of 'analytic_jacobian'
+
+    Returns:
+        Dictionary with the largest absolute difference and the relative
+        difference in norm for every perturbed level
+    """
+    analytic = analytic[..., fd["levels"]]
+    diff = fd["jacobian"] - analytic
+    norm = np.linalg.norm(analytic, axis=(0, 1))
+    return {
+        "max_abs": float(np.max(np.abs(diff))),
+        "relative": np.linalg.norm(diff, axis=(0, 1)) / np.where(norm > 0, norm, 1),
+    }
+
+
+def save_fd_jacobian(filename: str, fd: dict, los, analytic: np.ndarray | None = None) -> None:
+    """Function to save a finite-difference Jacobian
+
+    Args:
+        filename: Save name of the data
+        fd: Result of 'fd_jacobian'
+        los: Array with (zenith, azimuth) pairs
+        analytic: Result of 'analytic_jacobian' or None
+    """
+    savepath = find_dir(dirname="simulation")
+    with h5py.File(f"{savepath}/{filename}", "w") as file:
+        file["fd_jacobian"] = fd["jacobian"]
+        file["levels"] = fd["levels"]
+        file["steps"] = fd["steps"]
+        file["los"] = np.atleast_2d(los)
+        if analytic is not None:
+            file["jacobian"] = analytic
+            file["relative_difference"] = compare_jacobians(fd, analytic)["relative"]
@@ -1,3 +1,5 @@
+import functools
+import json
 import os
 from pathlib import Path
 from typing import List
@@ -8,10 +10,121 @@ class DirectoryNotFound(Exception):
         self.message = message
 
 
+ROOT_VARIABLE = "SIMPAPER_ROOT"
+CONFIG_FILE = Path.home() / ".config" / "simpaper" / "config.json"
+INDEX_DIRS = ("assets", "data")
+PRUNE = {"cache", "__pycache__", ".git"}
+
+
+@functools.lru_cache(maxsize=None)
+def data_root() -> Path:
+    """Function to find the root of the data directories
+
+    The root is the directory holding 'assets' and 'data'. It is taken
+    from the environment variable SIMPAPER_ROOT, then from the key
+    'root' in ~/.config/simpaper/config.json, and otherwise from the
+    first parent of this file that has a 'data' directory
+
+    Returns:
+        Path to the root
+
+    Raises:
+        DirectoryNotFound: Raise if the root cannot be found
+    """
+    root = os.getenv(ROOT_VARIABLE)
+    if root is None and CONFIG_FILE.exists():
+        with open(CONFIG_FILE, "r") as file:
+            root = json.load(file).get("root")
+    if root is not None:
+        root = Path(root).expanduser()
+        if not root.exists():
+            raise DirectoryNotFound(f"Data root '{root}' does not exist")
+        return root
+
+    for parent in Path(__file__).parents:
+        if (parent / "data").exists():
+            return parent
+    raise DirectoryNotFound("Cannot locate data directory")
+
+
+def _index_path() -> Path:
+    return data_root() / "data" / "cache" / "file_index.json"
+
+
+def _walk(root: Path) -> tuple[dict, dict]:
+    files = {}
+    dirs = {}
+    for name in INDEX_DIRS:
+        for dirpath, dirnames, filenames in os.walk(root / name):
+            dirnames[:] = sorted(d for d in dirnames if d not in PRUNE)
+            dirs[dirpath] = os.stat(dirpath).st_mtime_ns
+            for filename in sorted(filenames):
+                files.setdefault(filename, []).append(os.path.join(dirpath, filename))
+    return files, dirs
+
+
+def _is_current(dirs: dict) -> bool:
+    # adding or removing a file changes the modification time of its directory
+    try:
+        return all(os.stat(path).st_mtime_ns == mtime for path, mtime in dirs.items())
+    except FileNotFoundError:
+        return False
+
+
+def build_index() -> dict:
+    """Function to build the index of the data directories
+
+    Returns:
+        Dictionary with file name as key and list of paths as value
+    """
+    files, dirs = _walk(data_root())
+    path = _index_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp, "w") as file:
+        json.dump({"root": str(data_root()), "dirs": dirs, "files": files}, file)
+    os.replace(tmp, path)
+
+    file_index.cache_clear()
+    return files
+
+
+@functools.lru_cache(maxsize=None)
+def file_index() -> dict:
+    """Function to get the index of the data directories
+
+    Maps every file name in 'assets' and 'data' below 'data_root' to
+    its paths. The index is stored in data/cache/file_index.json and
+    rebuilt when a directory has changed since it was written, then
+    kept in memory for the rest of the process
+
+    Returns:
+        Dictionary with file name as key and list of paths as value
+    """
+    try:
+        with open(_index_path(), "r") as file:
+            index = json.load(file)
+        if index.get("root") == str(data_root()) and _is_current(index["dirs"]):
+            return index["files"]
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        pass
+    return build_index()
+
+
+def _lookup(filename: str, skip: str | None) -> Path | None:
+    for path in file_index().get(filename, []):
+        path = Path(path)
+        if skip is not None and skip in path.parts:
+            continue
+        if path.exists():
+            return path
+    return None
+
+
 def find_file(filename: str, skip: str | None = None) -> Path:
     """Function to find find file
 
-    Finds paths to a file with a certain filename.
+    Finds paths to a file with a certain filename in the file index.
     You can also skip certain directories with 'skip'
 
     Args:
@@ -24,37 +137,37 @@ def find_file(filename: str, skip: str | None = None) -> Path:
     Raises:
         FileNotFoundError: Raised if the file can not be found
     """
-    basedir = Path(__file__)
-
-    if skip is not None:
-        for parent in basedir.parents:
-            if not parent.match(skip):
-                current = parent.rglob(filename)
-                for path in current:
-                    if path.exists():
-                        return path
-    else:
-        for parent in basedir.parents:
-            current = parent.rglob(filename)
-            for path in current:
-                if path.exists():
-                    return path
-
-    raise FileNotFoundError(f"Can not find file '{filename}'")
+    path = _lookup(filename, skip)
+    if path is None:
+        # the file may have been added since the index was loaded
+        build_index()
+        path = _lookup(filename, skip)
+    if path is None:
+        raise FileNotFoundError(f"Can not find file '{filename}'")
+    return path
 
 
 def find_dir(dirname: str) -> Path:
-    basedir = Path(__file__)
-    subpath = "data"
-
-    for parent in basedir.parents:
-        current = parent / subpath
-        if current.exists():
-            datadir = current
-            break
-    target = datadir / dirname
+    target = data_root() / "data" / dirname
+    if not target.exists():
+        os.makedirs(target, exist_ok=True)
+    return target
+
+
+def find_assets(dirname: str) -> Path:
+    """Function to find a directory in assets
+
+    Creates the directory if it does not exist
+
+    Args:
+        dirname: Name of the directory in assets
+
+    Returns:
+        Path to the directory
+    """
+    target = data_root() / "assets" / dirname
     if not target.exists():
-        os.makedirs(target)
+        os.makedirs(target, exist_ok=True)
     return target
 
 
@@ -70,13 +183,9 @@ def find_retrieval(name: str) -> Path:
     Raises:
         FileNotFoundError: Raise if file can not be found
     """
-    filep = Path(__file__)
-    subpath = "data/simulation"
-
-    for parent in filep.parents:
-        current = parent / subpath / name
-        if current.exists():
-            return current
+    current = data_root() / "data" / "simulation" / name
+    if current.exists():
+        return current
     raise FileNotFoundError(f"Can not find file: {name}")
 
 
@@ -114,15 +223,7 @@ def imgs_path() -> Path:
     Raises:
         DirectoryNotFound: Raise if directory cannor be found
     """
-    root = Path(__file__)
-    datadir = "data"
-
-    for parent in root.parents:
-        current = parent / datadir
-
-        if current.exists():
-            imgsdir = current / "imgs"
-            if not imgsdir.exists():
-                os.makedirs(imgsdir)
-            return imgsdir
-    raise DirectoryNotFound("Cannot locate data directory")
+    imgsdir = data_root() / "data" / "imgs"
+    if not imgsdir.exists():
+        os.makedirs(imgsdir, exist_ok=True)
+    return imgsdir
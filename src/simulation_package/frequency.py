@@ -0,0 +1,113 @@
+import numpy as np
+
+# line centers
+LINES = {"tempera": 53.066906e9, "kimra": 233.9461e9}
+
+
+def uniform_grid(f0: float, half_width: float, flen: int) -> np.ndarray:
+    """Function to make a uniform frequency grid
+
+    Args:
+        f0: Line center
+        half_width: Half width of the grid
+        flen: Number of frequencies
+
+    Returns:
+        Frequency grid
+    """
+    return np.linspace(f0 - half_width, f0 + half_width, flen)
+
+
+def adaptive_grid(
+    f0: float,
+    half_width: float,
+    df_min: float,
+    df_max: float,
+    core_width: float = 3e6,
+    growth: float = 1.05,
+    channels: np.ndarray | None = None,
+) -> np.ndarray:
+    """Function to make a line adaptive frequency grid
+
+    The spacing is 'df_min' within 'core_width' of the line center and
+    grows by a factor 'growth' for every point in the wings, up to
+    'df_max'. The core is anchored on 'f0', or on 'channels' if given,
+    so that the output channels at the line center are grid points and
+    need no interpolation. With 'channels' the core holds every channel
+    within 'core_width' and the points needed between them for a
+    spacing of at most 'df_min'. The grid always ends exactly at
+    f0 +- half_width
+
+    Args:
+        f0: Line center
+        half_width: Half width of the grid
+        df_min: Spacing at the line center
+        df_max: Largest spacing in the wings
+        core_width: Half width of the region with spacing 'df_min'
+        growth: Growth factor of the spacing in the wings
+        channels: Output channels, increasing and uniform, or None
+
+    Returns:
+        Frequency grid
+    """
+    core_width = min(core_width, half_width)
+    if channels is None:
+        offsets = np.arange(0, core_width, df_min)
+        core = np.concatenate([-offsets[:0:-1], offsets])
+    else:
+        channels = np.asarray(channels, dtype=float) - f0
+        core = channels[np.abs(channels) < core_width]
+        spacing = core[1] - core[0]
+        split = int(np.ceil(spacing / df_min - 1e-9))
+        core = np.append(core[:-1, None] + spacing * np.arange(split) / split, core[-1])
+        df_min = spacing / split
+
+    # enough steps to reach df_max and then cover the rest with df_max
+    nsteps = int(np.ceil(np.log(df_max / df_min) / np.log(growth))) + 1
+    nsteps += int(np.ceil(half_width / df_max))
+    steps = np.cumsum(np.minimum(df_min * growth ** np.arange(1, nsteps + 1), df_max))
+
+    upper = core[-1] + steps
+    lower = core[0] - steps
+    upper = np.append(upper[upper < half_width], half_width)
+    lower = np.append(lower[lower > -half_width], -half_width)
+    return f0 + np.concatenate([lower[::-1], core, upper])
+
+
+def interpolate(f_src: np.ndarray, y_src: np.ndarray, f_out: np.ndarray) -> np.ndarray:
+    """Function to interpolate spectra along the frequency axis
+
+    Linear interpolation along the first axis of 'y_src', so all
+    Stokes components and Jacobian columns are done in one pass
+
+    Args:
+        f_src: Frequency grid of 'y_src', increasing
+        y_src: Spectra with frequency as first axis
+        f_out: Frequencies to interpolate to
+
+    Returns:
+        Spectra on 'f_out'
+    """
+    idx = np.clip(np.searchsorted(f_src, f_out) - 1, 0, len(f_src) - 2)
+    w = (f_out - f_src[idx]) / (f_src[idx + 1] - f_src[idx])
+    w = w.reshape((-1,) + (1,) * (y_src.ndim - 1))
+    return y_src[idx] * (1 - w) + y_src[idx + 1] * w
+
+
+def interpolation_error(y_reference: np.ndarray, y: np.ndarray) -> dict:
+    """Function to compare spectra on the same channels
+
+    Args:
+        y_reference: Reference spectra with frequency as first axis
+        y: Spectra to compare with frequency as first axis
+
+    Returns:
+        Dictionary with the largest absolute error, the root mean
+        square error and the largest absolute error per column
+    """
+    diff = np.asarray(y).reshape(len(y), -1) - np.asarray(y_reference).reshape(len(y_reference), -1)
+    return {
+        "max_abs": float(np.max(np.abs(diff))),
+        "rms": float(np.sqrt(np.mean(diff**2))),
+        "max_abs_per_column": np.max(np.abs(diff), axis=0),
+    }
@@ -1,10 +1,88 @@
 import os
-from datetime import datetime, timedelta
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Any, NamedTuple
 
 import h5py
 import numpy as np
 
 
+class Variable(NamedTuple):
+    """Name and value pair
+
+    Has the same 'name' and 'value' attributes as ARTS workspace
+    variables, so it can be passed to the savers together with them
+    """
+
+    name: str
+    value: Any
+
+
+DERIVED = ("jacobian", "avk", "retrieval_ss", "retrieval_eo")
+
+
+class OutputPolicy(NamedTuple):
+    """Storage settings of HDF5 datasets
+
+    The default policy writes contiguous, uncompressed datasets in
+    their own dtype, which keeps them readable as memory maps. Scalars
+    and arrays with less than 'min_size' elements are always written
+    that way
+
+    Args:
+        chunks: True for automatic chunks, None for contiguous datasets
+            or the number of rows per chunk along the first axis
+        compression: Compression filter, 'gzip' or 'lzf', or None
+        level: Compression level of 'gzip'
+        shuffle: Boolean if the shuffle filter should be used
+        float32: Names of the datasets that are stored as float32
+        min_size: Smallest number of elements that is chunked
+    """
+
+    chunks: Any = None
+    compression: str = None
+    level: int = None
+    shuffle: bool = False
+    float32: tuple = ()
+    min_size: int = 4096
+
+
+CONTIGUOUS = OutputPolicy()
+COMPRESSED = OutputPolicy(chunks=True, compression="gzip", level=4, shuffle=True, float32=DERIVED)
+
+
+def write_dataset(group, name: str, value, policy: OutputPolicy = None) -> None:
+    """Function to write a dataset according to an output policy
+
+    Args:
+        group: Open HDF5 file or group
+        name: Name of the dataset
+        value: Data, anything that numpy can convert
+        policy: OutputPolicy, CONTIGUOUS if not given
+    """
+    policy = CONTIGUOUS if policy is None else policy
+    data = np.asarray(value)
+    if data.ndim == 0 or data.dtype.kind not in "biufc" or data.size < policy.min_size:
+        group[name] = value
+        return
+
+    if name in policy.float32 and data.dtype.kind == "f":
+        data = data.astype(np.float32)
+
+    chunks = policy.chunks
+    if isinstance(chunks, int) and not isinstance(chunks, bool):
+        chunks = (min(chunks, data.shape[0]),) + data.shape[1:]
+
+    group.create_dataset(
+        name,
+        data=data,
+        chunks=chunks,
+        compression=policy.compression,
+        compression_opts=policy.level if policy.compression == "gzip" else None,
+        shuffle=policy.shuffle,
+    )
+
+
 class DottedDict:
     """
      Class to create DottedDict object which is takes an dictionary and
@@ -51,15 +129,90 @@ class DottedDict:
         return self.__dict__
 
 
-def read_hdf5(filename: str) -> dict:
+class LazyHDF5(Mapping):
+    """Class for dictionary style access to a HDF5 file
+
+    Datasets are read when they are accessed and kept afterwards.
+    Contiguous and uncompressed numeric datasets are returned as
+    read-only memory maps of the file, so only the parts that are used
+    are ever read, other datasets are read in full. Use 'read' to slice
+    any dataset on disk
+
+    Args:
+        filename: Name of the file
+    """
+
+    def __init__(self, filename: str):
+        self.filename = str(filename)
+        self.file = h5py.File(self.filename, "r")
+        self.group = self.file["kimra_data"] if "kimra_data" in self.file.keys() else self.file
+        self.values = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __iter__(self):
+        return iter(self.group.keys())
+
+    def __len__(self):
+        return len(self.group)
+
+    def __contains__(self, key):
+        return key in self.group
+
+    def __getitem__(self, key: str):
+        if key not in self.values:
+            dataset = self.group[key]
+            offset = dataset.id.get_offset() if dataset.shape else None
+
+            if (
+                offset is not None
+                and dataset.chunks is None
+                and dataset.compression is None
+                and dataset.dtype.kind in "biufc"
+            ):
+                self.values[key] = np.memmap(
+                    self.filename, dtype=dataset.dtype, mode="r", offset=offset, shape=dataset.shape
+                )
+            else:
+                self.values[key] = dataset[()]
+        return self.values[key]
+
+    def read(self, key: str, selection=()) -> Any:
+        """Read part of a dataset
+
+        Args:
+            key: Name of the dataset
+            selection: Index or tuple of slices
+
+        Returns:
+            Selected data
+        """
+        if key in self.values:
+            return np.array(self.values[key][selection])
+        return self.group[key][selection]
+
+    def close(self):
+        self.file.close()
+
+
+def read_hdf5(filename: str, lazy: bool = False) -> dict | LazyHDF5:
     """Function to read HDF5 file
 
     Args:
         filename: Name of the file
+        lazy: Boolean if the datasets should be read on access, see LazyHDF5
 
     Returns:
-       Dictionary with key value pairs with data
+       Dictionary with key value pairs with data, or an open LazyHDF5
+       that should be used as a context manager if 'lazy'
     """
+    if lazy:
+        return LazyHDF5(filename)
+
     with h5py.File(filename, "r") as file:
         if "kimra_data" in file.keys():
             dataset = file["kimra_data"]
@@ -76,31 +229,72 @@ def read_hdf5(filename: str) -> dict:
         return dictionary
 
 
-def read_mag(filename: str) -> dict:
+def read_mag(filename: str, resample: int | None = None, how: str = "mean") -> dict:
     """Function to read magnetic field data
 
     Args:
         filename: Name of the file
+        resample: Length of the bins in seconds, no resampling if None
+        how: Statistic of each bin, 'mean', 'min' or 'max'
 
     Returns:
-        Dictionary with key value pairs with data
+        Dictionary with key value pairs with data, 'dt' is a
+        datetime64 array with the start of each sample or bin
+
+    Raises:
+        ValueError: Raised if the number of samples does not match the
+        seconds between 'start' and 'end'
     """
     with h5py.File(filename, "r") as file:
         start = file["start"][()].decode("utf-8")  # pyright:ignore
         end = file["end"][()].decode("utf-8")  # pyright:ignore
         bfield = file["B"][:]  # pyright:ignore
 
-        dt = make_date(start, end)
+    dt = make_date(start, end)
+    if len(dt) != len(bfield):
+        raise ValueError(f"'{filename}' has {len(bfield)} samples but {len(dt)} seconds from {start} to {end}")
+    if resample is not None and resample > 1:
+        dt, bfield = resample_bins(dt, bfield, resample, how)
+
+    return {"dt": dt, "bfield": bfield}
+
+
+def resample_bins(dt: np.ndarray, data: np.ndarray, size: int, how: str = "mean") -> tuple:
+    """Function to resample a time series in bins of equal length
+
+    The last bin holds the remaining samples if the length of the
+    series is not a multiple of 'size'
+
+    Args:
+        dt: Time axis
+        data: Data along the time axis
+        size: Number of samples per bin
+        how: Statistic of each bin, 'mean', 'min' or 'max'
+
+    Returns:
+        Tuple with the start time and the statistic of each bin
+
+    Raises:
+        ValueError: Raised if 'how' is not supported
+    """
+    ufuncs = {"mean": np.add, "min": np.minimum, "max": np.maximum}
+    if how not in ufuncs:
+        raise ValueError(f"Can not resample with '{how}', use one of {list(ufuncs)}")
 
-        return {"dt": dt, "bfield": bfield}
+    starts = np.arange(0, len(data), size)
+    binned = ufuncs[how].reduceat(data, starts)
+    if how == "mean":
+        binned = binned / np.diff(np.append(starts, len(data)))
+    return dt[starts], binned
 
 
-def save_ret(ROOT: str, filename: str, *argv) -> None:
+def save_ret(ROOT: str, filename: str, *argv, policy: OutputPolicy = None) -> None:
     """Function to save retrieval data
 
     Args:
         ROOT: File path to repository base
         filename: Save name of the data with retrieval
+        policy: OutputPolicy of the datasets
     """
     savepath = f"{ROOT}/data/retrieval"
     if not os.path.exists(savepath):
@@ -108,7 +302,7 @@ def save_ret(ROOT: str, filename: str, *argv) -> None:
 
     with h5py.File(f"{savepath}/{filename}", "w") as file:
         for data in argv:
-            file[data.name] = data.value
+            write_dataset(file, data.name, data.value, policy)
 
 
 def mm_scaler(data: np.ndarray) -> np.ndarray:
@@ -121,8 +315,8 @@ def mm_scaler(data: np.ndarray) -> np.ndarray:
         Scaled data
     """
 
-    minval = min(data)
-    maxval = max(data)
+    minval = np.min(data)
+    maxval = np.max(data)
 
     norm_data = (data - minval) / (maxval - minval)
     return norm_data
@@ -132,7 +326,7 @@ def get_bound(data: np.ndarray, f0: float) -> tuple:
     """Function to get indexes
 
     Get indexes +- 15 Mhz from line center f0 for the frequency array
-    data
+    data, which must be increasing
 
     Args:
         data: Frequency array
@@ -141,9 +335,8 @@ def get_bound(data: np.ndarray, f0: float) -> tuple:
     Returns:
         Tuple with start and end indexes
     """
-    f = data - f0
-    s = np.where(f > -1.5e7)[0][0]
-    e = np.where(f > 1.5e7)[0][0]
+    s = np.searchsorted(data, f0 - 1.5e7, side="right")
+    e = np.searchsorted(data, f0 + 1.5e7, side="right")
 
     return s, e
 
@@ -159,14 +352,8 @@ def make_date(start: str, end: str) -> np.ndarray:
         end: End date
 
     Returns:
-        Array with datetime values
+        Array with datetime64 values
     """
-    dt_start = datetime.strptime(start, "%y%m%d")
-    dt_end = datetime.strptime(end, "%y%m%d")
-    date_range = []
-    current_date = dt_start
-
-    while current_date < dt_end:
-        date_range.append(current_date)
-        current_date += timedelta(seconds=1)
-    return np.array(date_range)
+    dt_start = np.datetime64(datetime.strptime(start, "%y%m%d"), "s")
+    dt_end = np.datetime64(datetime.strptime(end, "%y%m%d"), "s")
+    return np.arange(dt_start, dt_end, np.timedelta64(1, "s"))
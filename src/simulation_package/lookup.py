@@ -0,0 +1,133 @@
+import os
+from contextlib import contextmanager
+
+import numpy as np
+
+from simulation_package.cache import make_key
+from simulation_package.files import find_assets
+
+# temperature perturbations of the table in K, covers the retrieval updates
+T_PERT = np.arange(-60, 61, 10, dtype=float)
+
+
+def unpolarised_species(species: list[str]) -> list[str]:
+    """Function to get the species that can use the lookup table
+
+    Args:
+        species: Absorption species tags
+
+    Returns:
+        Species without Zeeman splitting
+    """
+    return [tag for tag in species if "-Z-" not in tag]
+
+
+def lookup_path(f_grid, p_grid, species, t_field, vmr_field, t_pert=T_PERT):
+    """Function to get the path of a lookup table
+
+    Tables are stored in 'assets/abs_lookup' next to the line data and
+    are named after a hash of everything they depend on. The table is
+    built around the reference temperature and VMR profiles of the
+    workspace, so they are part of the key
+
+    Args:
+        f_grid: Frequency grid
+        p_grid: Pressure grid
+        species: Absorption species tags of the table
+        t_field: Reference temperature field
+        vmr_field: Reference VMR field of the species of the table
+        t_pert: Temperature perturbations
+
+    Returns:
+        Path to the table
+    """
+    key = make_key(
+        kind="abs_lookup",
+        f_grid=np.asarray(f_grid),
+        p_grid=np.asarray(p_grid),
+        species=list(species),
+        t_field=np.asarray(t_field),
+        vmr_field=np.asarray(vmr_field),
+        t_pert=np.asarray(t_pert),
+    )
+    return find_assets(dirname="abs_lookup") / f"{key}.xml"
+
+
+@contextmanager
+def _species_subset(ws, species, keep):
+    if len(keep) == len(species):
+        yield
+        return
+
+    # only imported here, the table paths are also used without ARTS
+    import pyarts
+
+    lines = pyarts.arts.ArrayOfArrayOfAbsorptionLines(ws.abs_lines_per_species.value)
+    vmr_field = np.array(ws.vmr_field.value)
+
+    ws.abs_speciesSet(species=[species[i] for i in keep])
+    ws.abs_lines_per_species = pyarts.arts.ArrayOfArrayOfAbsorptionLines([lines[i] for i in keep])
+    ws.vmr_field = vmr_field[keep]
+    ws.propmat_clearsky_agendaAuto()
+    ws.lbl_checkedCalc()
+    ws.atmfields_checkedCalc()
+    ws.propmat_clearsky_agenda_checkedCalc()
+    try:
+        yield
+    finally:
+        ws.abs_speciesSet(species=species)
+        ws.abs_lines_per_species = lines
+        ws.vmr_field = vmr_field
+        ws.lbl_checkedCalc()
+        ws.atmfields_checkedCalc()
+
+
+def set_abs_lookup(ws, species, t_pert=T_PERT):
+    """Function to use an absorption lookup table
+
+    Reads the table for the current f_grid, p_grid, unpolarised
+    species, t_field and vmr_field, or computes and stores it if there
+    is none. The table is computed with only the unpolarised species in
+    the workspace, which are restored afterwards. The propagation
+    matrix agenda then takes the unpolarised species from the table
+    while Zeeman split species are still computed on the fly. The
+    workspace must have passed atmfields_checkedCalc and lbl_checkedCalc
+
+    Args:
+        ws: ARTS workspace
+        species: Absorption species tags of the workspace
+        t_pert: Temperature perturbations
+
+    Returns:
+        ARTS workspace
+    """
+    keep = [i for i, tag in enumerate(species) if tag in unpolarised_species(species)]
+    path = lookup_path(
+        ws.f_grid.value,
+        ws.p_grid.value,
+        [species[i] for i in keep],
+        ws.t_field.value,
+        np.asarray(ws.vmr_field.value)[keep],
+        t_pert,
+    )
+
+    if path.exists():
+        ws.ReadXML(ws.abs_lookup, str(path))
+    else:
+        print(f"Computing absorption lookup table {path.name}")
+        with _species_subset(ws, species, keep):
+            ws.abs_lookupSetup()
+            ws.abs_p = ws.p_grid.value
+            ws.abs_t_pert = t_pert
+            ws.abs_lookupCalc()
+
+        # other workers may read the table, so it is moved in place when complete
+        tmp = path.with_name(f"{path.stem}.{os.getpid()}.tmp.xml")
+        ws.WriteXML(output_file_format="binary", input=ws.abs_lookup, filename=str(tmp))
+        os.replace(f"{tmp}.bin", f"{path}.bin")
+        os.replace(tmp, path)
+
+    ws.abs_lookupAdapt()
+    ws.propmat_clearsky_agendaAuto(use_abs_lookup=1)
+    ws.propmat_clearsky_agenda_checkedCalc()
+    return ws
@@ -1,13 +1,90 @@
+import functools
+import os
+import tempfile
+
 import pyarts
 import numpy as np
 from simulation_package.hdf import DottedDict
-from simulation_package.files import find_file
+from simulation_package.files import find_file, find_dir
+from simulation_package.cache import make_key
+from simulation_package.profiles import load_profile
+
+GRID_FILES = {
+    "altitude": "24010418_z.xml",
+    "temperature": "24010418_t.xml",
+    "pressure": "p_grid_137.xml",
+    "apriori": "ECMWF_jan.xml",
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _source_paths() -> tuple:
+    return tuple(str(find_file(filename=filename, skip="local")) for filename in GRID_FILES.values())
+
+
+def _stat(paths: tuple) -> tuple:
+    return tuple((path, os.stat(path).st_mtime_ns, os.stat(path).st_size) for path in paths)
+
+
+def _signature() -> tuple:
+    try:
+        return _stat(_source_paths())
+    except FileNotFoundError:
+        # the source files have moved, look them up again
+        _source_paths.cache_clear()
+        return _stat(_source_paths())
+
+
+def _read_xml(paths: tuple) -> dict:
+    z, t, p, apriori = (pyarts.xml.load(path) for path in paths)
+    return {
+        "altitude": np.asarray(z.to_dict()["data"])[:, 0, 0],
+        "temperature": np.asarray(t.to_dict()["data"])[:, 0, 0],
+        "pressure": np.asarray(p),
+        "apriori": np.asarray(apriori),
+    }
+
+
+@functools.lru_cache(maxsize=8)
+def _load_grids(signature: tuple) -> dict:
+    cachefile = find_dir(dirname="cache/grids") / f"{make_key(kind='grids', signature=signature)}.npz"
+
+    try:
+        with np.load(cachefile) as data:
+            grids = {name: data[name] for name in GRID_FILES}
+    except (FileNotFoundError, OSError, KeyError, ValueError):
+        grids = _read_xml(tuple(path for path, _, _ in signature))
+        fd, tmp = tempfile.mkstemp(dir=cachefile.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as file:
+            np.savez(file, **grids)
+        os.replace(tmp, cachefile)
+
+    for array in grids.values():
+        array.setflags(write=False)
+    return grids
+
+
+def load_grids() -> dict:
+    """Function to load the full atmospheric grids
+
+    The XML files are parsed once and stored as '.npz' in
+    'data/cache/grids', and kept in memory for the rest of the
+    process. Both layers are keyed by the paths, modification times
+    and sizes of the XML files. The arrays are read-only since they
+    are shared between all callers
+
+    Returns:
+        Dictionary with altitude, temperature, pressure and apriori
+    """
+    return _load_grids(_signature())
 
 
 def make_atm_grids(
     start: float,
     disturb_flag: bool = False,
     index: int | None = None,
+    delta: float = 5,
+    timestamp=None,
 ) -> DottedDict:
     """Function to make atmospheric grids
 
@@ -15,35 +92,17 @@ def make_atm_grids(
         start: Start altitude
         disturb_flag: Boolean if disturbance should be used
         index: Index of where disturbance should be done
+        delta: Size of the disturbance in K
+        timestamp: Time of the profiles to use from the profile store,
+            the fixed XML grids are used if None
 
     Returns:
         DottedDict object with grids
     """
-
-    z = pyarts.xml.load(
-        str(find_file(filename="24010418_z.xml", skip="local")),
-    )
-    t = pyarts.xml.load(
-        str(find_file(filename="24010418_t.xml", skip="local")),
-    )
-    p = pyarts.xml.load(
-        str(find_file(filename="p_grid_137.xml", skip="local")),
-    )
-    apriori = pyarts.xml.load(
-        str(find_file(filename="ECMWF_jan.xml", skip="local")),
-    )
-
-    z = z.to_dict()["data"]
-    t = t.to_dict()["data"]
-
-    grids = DottedDict(
-        {
-            "temperature": np.array([i[0][0] for i in t]),
-            "altitude": np.array([i[0][0] for i in z]),
-            "pressure": np.array([i for i in p]),
-            "apriori": np.array([i for i in apriori]),
-        }
-    )
+    if timestamp is None:
+        grids = DottedDict(load_grids())
+    else:
+        grids = DottedDict(load_profile(timestamp))
 
     s = np.where(grids.altitude >= start)[0][0]
     altered_grids = DottedDict(
@@ -56,10 +115,12 @@ def make_atm_grids(
         }
     )
     if disturb_flag and index is not None:
-        altered_grids = distrub(altered_grids, index)
+        altered_grids = distrub(altered_grids, index, delta)
     return altered_grids
 
 
-def distrub(grids, index):
-    grids.temperature[index] += 5
+def distrub(grids, index, delta=5):
+    # copy first, the grids share read-only memory with the grid cache
+    grids.temperature = grids.temperature.copy()
+    grids.temperature[index] += delta
     return grids
@@ -6,6 +6,8 @@ import matplotlib as mpl
 
 from .files import find_file, find_files, imgs_path
 from .hdf import get_bound, read_hdf5, read_mag, mm_scaler
+from .measurements import MeasurementCatalogue
+from .preprocess import preprocess, preprocess_measurements
 
 
 def meas_plot():
@@ -15,12 +17,11 @@ def meas_plot():
     path = find_file(filename="Data_2024-01-04_15-06-38_RPGFFTS.hdf5")
     measurement = read_hdf5(path)
     f0 = 233.9461e9  # linecenter
-    s = 4635
-    e = 5028
 
     # full spectrum plot
-    freq = measurement["f"][20::]
-    spec = measurement["y"][20::]
+    spectrum = preprocess(measurement["f"], measurement["y"], f0=f0, half_width=None, normalise=False)
+    freq = spectrum["f"]
+    spec = spectrum["y"][0]
     s, e = get_bound(data=freq, f0=f0)
 
     xmin, xmax, ymin, ymax = freq[s] / 1e9, freq[e] / 1e9, 120, 134
@@ -157,26 +158,30 @@ def meas_sim_comparison():
     """Function to plot measurement and simulation
 
     Plots comparison between measured spectras and simulated in
-    four different lines of sight: 0, 90, 180 and 270 deg
+    four different lines of sight: 0, 90, 180 and 270 deg. The
+    measurements are selected from the measurement catalogue, so only
+    the four files that are plotted are read
     """
-    measp, simp = find_files()
-    meas = [read_hdf5(file) for file in sorted(measp)]
+    _, simp = find_files()
     sims = [read_hdf5(file) for file in sorted(simp)]
     hmap = {0: "0", 90: "90", 180: "180", -90: "270"}
+    catalogue = MeasurementCatalogue()
     measurements = {}
     simulations = {}
 
-    for m in meas:
-        azimuth = m["azimuth"]
-        measurements[hmap[azimuth]] = m
+    paths = [
+        catalogue.query(start="2024-01-04T00:00:00", end="2024-01-04T23:59:59", azimuth=azimuth)[0]["path"]
+        for azimuth in hmap
+    ]
+    spectra = preprocess_measurements(paths, f0=233.9461e9, half_width=1.5e7, trim=0)
+    for i, key in enumerate(hmap.values()):
+        measurements[key] = {"f": spectra["f"], "y": spectra["y"][i]}
 
     for s in sims:
         azimuth = s["azimuth"]
         simulations[hmap[azimuth]] = s
 
     f0 = 233.9461e9
-    s = 4635
-    e = 5028
 
     fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(
         ncols=2,
@@ -188,8 +193,8 @@ def meas_sim_comparison():
 
     # phi = 0
     ax1.plot(
-        (measurements["0"]["f"][s:e] - f0) / 1e6,
-        mm_scaler(measurements["0"]["y"][s:e]),
+        (measurements["0"]["f"] - f0) / 1e6,
+        measurements["0"]["y"],
         label="Measurement",
         color="black",
     )
@@ -234,8 +239,8 @@ def meas_sim_comparison():
 
     # phi = 180
     ax2.plot(
-        (measurements["180"]["f"][s:e] - f0) / 1e6,
-        mm_scaler(measurements["180"]["y"][s:e]),
+        (measurements["180"]["f"] - f0) / 1e6,
+        measurements["180"]["y"],
         label="Measurement",
         color="black",
     )
@@ -279,8 +284,8 @@ def meas_sim_comparison():
 
     # phi = 90
     ax3.plot(
-        (measurements["90"]["f"][s:e] - f0) / 1e6,
-        mm_scaler(measurements["90"]["y"][s:e]),
+        (measurements["90"]["f"] - f0) / 1e6,
+        measurements["90"]["y"],
         label="Measurement",
         color="black",
     )
@@ -326,8 +331,8 @@ def meas_sim_comparison():
 
     # phi = 270
     ax4.plot(
-        (measurements["270"]["f"][s:e] - f0) / 1e6,
-        mm_scaler(measurements["270"]["y"][s:e]),
+        (measurements["270"]["f"] - f0) / 1e6,
+        measurements["270"]["y"],
         label="Measurement",
         color="black",
     )
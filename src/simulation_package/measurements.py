@@ -0,0 +1,137 @@
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+import h5py
+import numpy as np
+
+from simulation_package.files import find_dir
+
+
+def _decode(value):
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+def scan_file(path) -> dict:
+    """Function to read the metadata of a measurement file
+
+    Only scalar datasets and the first and last frequency are read,
+    the spectrum is never loaded
+
+    Args:
+        path: Path to the RPG FFTS file
+
+    Returns:
+        Dictionary with the metadata
+    """
+    path = Path(path)
+    with h5py.File(path, "r") as file:
+        dataset = file["kimra_data"] if "kimra_data" in file.keys() else file
+        f = dataset["f"]
+        date = _decode(dataset["date"][()])
+        time = _decode(dataset["time"][()])
+
+        return {
+            "path": str(path),
+            "time": datetime.strptime(f"{date} {time}", "%Y-%m-%d %H-%M-%S").isoformat(),
+            "azimuth": float(dataset["azimuth"][()]),
+            "za": float(dataset["za"][()]),
+            "nchannels": int(f.shape[0]),
+            "fmin": float(f[0]),
+            "fmax": float(f[-1]),
+            "integration": int(dataset["integration"][()]),
+            "mtime": os.stat(path).st_mtime_ns,
+            "size": os.stat(path).st_size,
+        }
+
+
+class MeasurementCatalogue:
+    """Class for an index of RPG FFTS measurement files
+
+    The index is kept in data/cache/measurements.json and holds the
+    metadata of every RPG FFTS file below the measurement
+    directory, so queries never open the files
+
+    Args:
+        root: Directory with the measurements, 'data/measurements' if not given
+        update: Boolean if the index should be updated when loaded
+    """
+
+    def __init__(self, root=None, update=True):
+        self.root = Path(root) if root is not None else find_dir(dirname="measurements")
+        self.path = find_dir(dirname="cache") / "measurements.json"
+        self.entries = {}
+
+        try:
+            with open(self.path, "r") as file:
+                index = json.load(file)
+            if index.get("root") == str(self.root):
+                self.entries = index["entries"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            pass
+
+        if update:
+            self.update()
+
+    def update(self) -> int:
+        """Update the index
+
+        Only files that are new or have changed since they were indexed
+        are scanned, and files that no longer exist are removed
+
+        Returns:
+            Number of scanned files
+        """
+        entries = {}
+        scanned = 0
+        for path in sorted(self.root.rglob("*RPGFFTS*.hdf5")):
+            key = str(path)
+            stat = path.stat()
+            entry = self.entries.get(key)
+            if entry is None or entry["mtime"] != stat.st_mtime_ns or entry["size"] != stat.st_size:
+                entry = scan_file(path)
+                scanned += 1
+            entries[key] = entry
+
+        if scanned or entries.keys() != self.entries.keys():
+            self.entries = entries
+            self.save()
+        return scanned
+
+    def save(self) -> None:
+        """Write the index to disk"""
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w") as file:
+            json.dump({"root": str(self.root), "entries": self.entries}, file, indent=1)
+        os.replace(tmp, self.path)
+
+    def query(self, start=None, end=None, azimuth=None, za=None, tol=0.5) -> list[dict]:
+        """Select measurements
+
+        Args:
+            start: First time, datetime or ISO string
+            end: Last time, inclusive, datetime or ISO string
+            azimuth: Azimuth angle, compared modulo 360
+            za: Zenith angle
+            tol: Tolerance of the angles
+
+        Returns:
+            List with the metadata of the matching files sorted by time
+        """
+        start = None if start is None else np.datetime64(start, "s")
+        end = None if end is None else np.datetime64(end, "s")
+
+        result = []
+        for entry in self.entries.values():
+            time = np.datetime64(entry["time"], "s")
+            if start is not None and time < start:
+                continue
+            if end is not None and time > end:
+                continue
+            if azimuth is not None and abs((entry["azimuth"] - azimuth + 180) % 360 - 180) > tol:
+                continue
+            if za is not None and abs(entry["za"] - za) > tol:
+                continue
+            result.append(entry)
+        return sorted(result, key=lambda entry: entry["time"])
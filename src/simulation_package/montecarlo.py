@@ -0,0 +1,183 @@
+import time
+import traceback
+
+import h5py
+import numpy as np
+
+from simulation_package.files import find_dir
+from simulation_package.hdf import write_dataset
+from simulation_package.parallel import iter_jobs, report_job
+
+
+PRODUCTS = ("x", "retrieval_eo", "retrieval_ss")
+FAILED = -1  # status of a member whose OEM raised
+
+
+def _failed(member, x_true, error):
+    products = {name: np.full(x_true.shape, np.nan) for name in PRODUCTS}
+    return member, products, {"status": FAILED, "iterations": 0, "error": error}
+
+
+def _montecarlo_job(line, zeeman, members, seeds, warm_start):
+    # ARTS is imported here, the summary does not need it
+    from simulation_package.retrieval import Retrieval
+
+    retrieval = Retrieval(line=line, zeeman=zeeman, save_simulation=False)
+    retrieval.require("simulation")
+    x_true = np.append(retrieval.atm.temperature, [0, 0])
+
+    start = None
+    if warm_start:
+        # every member starts from the same state, so the split over workers does not matter
+        retrieval.set_measurement(retrieval.y_true)
+        retrieval.run_OEM()
+        start = retrieval.converged
+
+    results = []
+    for member, seed in zip(members, seeds):
+        try:
+            retrieval.set_measurement(retrieval.simulated_measurement(rng=np.random.default_rng(seed)))
+            log = retrieval.run_OEM(start=start)
+            results.append((member, retrieval.products(names=PRODUCTS), log))
+        except Exception:
+            results.append(_failed(member, x_true, traceback.format_exc()))
+            print(f"member {member} failed:\n{results[-1][2]['error']}")
+    return x_true, results
+
+
+def summarise(x, x_true, eo, ss, converged) -> dict:
+    """Function to compare Monte Carlo retrievals with the OEM errors
+
+    Only converged members are used. The empirical standard deviation
+    of the retrievals is the noise error, so it is compared with the
+    mean 'retrieval_eo', and the bias is shown next to the mean
+    smoothing error 'retrieval_ss'
+
+    Args:
+        x: Retrieved states of shape (n, nx)
+        x_true: True state
+        eo: Observation errors of shape (n, nx)
+        ss: Smoothing errors of shape (n, nx)
+        converged: Boolean array with the converged members
+
+    Returns:
+        Dictionary with bias, empirical covariance and standard
+        deviation, mean OEM errors and the ratio of the noise errors
+    """
+    x, eo, ss = x[converged], eo[converged], ss[converged]
+    covariance = np.atleast_2d(np.cov(x, rowvar=False))
+    std = np.sqrt(np.diag(covariance))
+    eo_mean = eo.mean(axis=0)
+    return {
+        "bias": x.mean(axis=0) - x_true,
+        "covariance": covariance,
+        "std": std,
+        "eo_mean": eo_mean,
+        "ss_mean": ss.mean(axis=0),
+        "std_to_eo": std / eo_mean,
+        "members_used": int(converged.sum()),
+    }
+
+
+def montecarlo(
+    n: int = 200,
+    line: str = "kimra",
+    zeeman: bool = True,
+    seed: int = 0,
+    jobs: int = 1,
+    warm_start: bool = False,
+    filename: str = None,
+) -> dict:
+    """Function to run retrievals of one true state with many noise realisations
+
+    Every member gets its own noise stream spawned from one
+    SeedSequence, so the noise of each member only depends on 'seed'
+    and not on the number of workers. The members are split into one
+    contiguous part per worker, and every worker sets up one retrieval
+    and the noise free spectrum once and then only swaps the
+    measurement. Every OEM starts from the a priori, or with
+    'warm_start' from the retrieval of the noise free spectrum, so the
+    results do not depend on the order of the members or the number of
+    workers. A member whose OEM raises gets status -1 and is left out
+    of the summary like a member that did not converge. The members
+    and the summary from 'summarise' are saved to 'filename'
+
+    Args:
+        n: Number of members
+        line: Name of the line
+        zeeman: Boolean if Zeeman splitting should be used
+        seed: Seed of the SeedSequence
+        jobs: Number of worker processes
+        warm_start: Boolean if each OEM should start from the retrieval
+            of the noise free spectrum
+        filename: Save name of the summary, 'montecarlo_<line>.hdf5' if not given
+
+    Returns:
+        Dictionary with the summary
+    """
+    seeds = np.random.SeedSequence(seed).spawn(n)
+    parts = np.array_split(np.arange(n), max(min(jobs, n), 1))
+    tasks = {
+        f"{line}_{i}": {
+            "line": line,
+            "zeeman": zeeman,
+            "members": part.tolist(),
+            "seeds": [seeds[m] for m in part],
+            "warm_start": warm_start,
+        }
+        for i, part in enumerate(parts)
+    }
+
+    t0 = time.perf_counter()
+    x_true, members, failures = None, {}, {}
+    for name, ok, value in iter_jobs(_montecarlo_job, tasks, workers=jobs):
+        report_job(name, ok, value)
+        if not ok:
+            failures[name] = value
+            continue
+        x_true, results = value
+        for member, products, log in results:
+            members[member] = (products, log)
+    dt = time.perf_counter() - t0
+
+    if x_true is None:
+        raise RuntimeError(f"All Monte Carlo parts failed: {', '.join(failures)}")
+    # the members of a failed part are kept as failed members
+    for name, error in failures.items():
+        for member in tasks[name]["members"]:
+            members[member] = _failed(member, x_true, error)[1:]
+
+    order = sorted(members)
+    x = np.array([members[m][0]["x"] for m in order])
+    eo = np.array([members[m][0]["retrieval_eo"] for m in order])
+    ss = np.array([members[m][0]["retrieval_ss"] for m in order])
+    status = np.array([members[m][1]["status"] for m in order])
+    iterations = np.array([members[m][1]["iterations"] for m in order])
+    summary = summarise(x, x_true, eo, ss, converged=status == 0)
+
+    filename = f"montecarlo_{line}.hdf5" if filename is None else filename
+    savepath = find_dir(dirname="simulation")
+    with h5py.File(savepath / filename, "w") as file:
+        for key, value in summary.items():
+            write_dataset(file, key, value)
+        for key, value in (
+            ("member", np.array(order)),
+            ("x", x),
+            ("retrieval_eo", eo),
+            ("retrieval_ss", ss),
+            ("status", status),
+            ("iterations", iterations),
+            ("x_true", x_true),
+        ):
+            write_dataset(file, key, value)
+        file["seed"] = seed
+        file["warm_start"] = warm_start
+
+    ran = status != FAILED
+    print(
+        f"Saved {n} members ({summary['members_used']} converged, {np.sum(~ran)} failed) in {savepath / filename}, "
+        f"{dt:.0f} s, {np.mean(iterations[ran]) if ran.any() else 0:.1f} iterations per member"
+    )
+    if failures:
+        print(f"Failed parts: {', '.join(failures)}")
+    return summary
@@ -0,0 +1,105 @@
+import itertools
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Callable, Iterator
+
+from tqdm import tqdm
+
+
+class JobError(Exception):
+    def __init__(self, message, failures):
+        self.message = message
+        self.failures = failures
+        super().__init__(message)
+
+
+def _call(func: Callable, kwargs: dict):
+    try:
+        return True, func(**kwargs)
+    except Exception:
+        return False, traceback.format_exc()
+
+
+def iter_jobs(func: Callable, jobs, workers: int = 1, total: int | None = None) -> Iterator[tuple[str, bool, Any]]:
+    """Function to iterate over independent jobs as they finish
+
+    Runs 'func' once for every job, either serially in this process
+    (workers = 1) or through a process pool, and yields the outcome of
+    each job as soon as it is done. The pool holds at most two jobs per
+    worker, and a new job is only taken from 'jobs' when one finishes,
+    so an iterator of jobs is consumed as it is needed. The progress
+    over the jobs is shown with tqdm
+
+    Args:
+        func: Picklable function to call
+        jobs: Dictionary with job name as key and keyword arguments as
+            value, or iterator of (name, keyword arguments) pairs
+        workers: Number of worker processes
+        total: Number of jobs if 'jobs' is an iterator, for the progress bar
+
+    Yields:
+        Tuple with job name, success flag and either the return value
+        of 'func' or the formatted traceback of the failure
+    """
+    if isinstance(jobs, dict):
+        total = len(jobs)
+        jobs = iter(jobs.items())
+
+    with tqdm(total=total) as progress:
+        if workers <= 1 or total is not None and total <= 1:
+            for name, kwargs in jobs:
+                ok, value = _call(func, kwargs)
+                progress.update()
+                yield name, ok, value
+            return
+
+        with ProcessPoolExecutor(max_workers=workers if total is None else min(workers, total)) as pool:
+            futures = {pool.submit(_call, func, kwargs): name for name, kwargs in itertools.islice(jobs, 2 * workers)}
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = futures.pop(future)
+                    for next_name, kwargs in itertools.islice(jobs, 1):
+                        futures[pool.submit(_call, func, kwargs)] = next_name
+                    ok, value = future.result()
+                    progress.update()
+                    yield name, ok, value
+
+
+def run_jobs(func: Callable, jobs: dict, workers: int = 1) -> dict:
+    """Function to run independent jobs
+
+    Runs 'func' once for every entry in 'jobs' with 'iter_jobs'.
+    A failing job does not stop the other jobs, all failures are
+    reported by name when every job has finished
+
+    Args:
+        func: Picklable function to call
+        jobs: Dictionary with job name as key and keyword arguments as value
+        workers: Number of worker processes
+
+    Returns:
+        Dictionary with job name as key and return value of 'func' as value
+
+    Raises:
+        JobError: Raised if one or more jobs failed
+    """
+    results = {}
+    failures = {}
+
+    for name, ok, value in iter_jobs(func, jobs, workers):
+        report_job(name, ok, value)
+        if ok:
+            results[name] = value
+        else:
+            failures[name] = value
+
+    if failures:
+        raise JobError(f"{len(failures)} of {len(jobs)} jobs failed: {', '.join(failures)}", failures)
+    return results
+
+
+def report_job(name: str, ok: bool, value) -> None:
+    # finished jobs are shown by the progress bar
+    if not ok:
+        tqdm.write(f"job '{name}' failed:\n{value}")
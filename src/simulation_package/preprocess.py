@@ -0,0 +1,164 @@
+import os
+
+import numpy as np
+
+from simulation_package.cache import ResultCache, make_key
+from simulation_package.files import find_dir
+from simulation_package.hdf import LazyHDF5
+
+F0 = 233.9461e9  # linecenter
+
+
+def window_bounds(f: np.ndarray, f0: float, half_width: float) -> tuple[int, int]:
+    """Function to get the indexes of a window around f0
+
+    Args:
+        f: Frequency array, increasing
+        f0: Line center
+        half_width: Half width of the window
+
+    Returns:
+        Tuple with start and end indexes, the first channels above
+        f0 - half_width and f0 + half_width
+    """
+    s = np.searchsorted(f, f0 - half_width, side="right")
+    e = np.searchsorted(f, f0 + half_width, side="right")
+    return int(s), int(e)
+
+
+def remove_baseline(f: np.ndarray, y: np.ndarray, f0: float, order: int, core_width: float) -> np.ndarray:
+    """Function to remove a polynomial baseline
+
+    The polynomial is fitted to the channels further than 'core_width'
+    from the line center, for all spectra in one least squares solve
+
+    Args:
+        f: Frequency array
+        y: Spectra of shape (n_spectra, n_channels)
+        f0: Line center
+        order: Order of the polynomial
+        core_width: Half width of the line that is excluded from the fit
+
+    Returns:
+        Spectra with the baseline removed
+    """
+    x = (f - f0) / np.max(np.abs(f - f0))
+    wings = np.abs(f - f0) > core_width
+    coefficients = np.polynomial.polynomial.polyfit(x[wings], y[:, wings].T, order)
+    return y - np.polynomial.polynomial.polyval(x, coefficients)
+
+
+def preprocess(
+    f: np.ndarray,
+    y: np.ndarray,
+    f0: float = F0,
+    half_width: float = 15e6,
+    trim: int = 20,
+    average: int = 1,
+    baseline: int = None,
+    core_width: float = 5e6,
+    normalise: bool = True,
+) -> dict:
+    """Function to preprocess a stack of spectra
+
+    Trims the first channels, cuts out the window around 'f0', removes
+    a polynomial baseline, averages neighbouring channels and scales
+    each spectrum to [0, 1], in that order and for all spectra at once
+
+    Args:
+        f: Frequency array shared by all spectra
+        y: Spectra of shape (n_spectra, n_channels) or (n_channels,)
+        f0: Line center
+        half_width: Half width of the window, the full band if None
+        trim: Number of channels removed at the start of the band
+        average: Number of channels averaged into one
+        baseline: Order of the baseline polynomial, no removal if None
+        core_width: Half width of the line that is excluded from the
+            baseline fit
+        normalise: Boolean if the spectra should be scaled to [0, 1]
+
+    Returns:
+        Dictionary with the frequencies 'f' and the spectra 'y' of shape
+        (n_spectra, n_out)
+    """
+    y = np.atleast_2d(y)[:, trim:]
+    f = np.asarray(f)[trim:]
+
+    if half_width is not None:
+        s, e = window_bounds(f, f0, half_width)
+        f, y = f[s:e], y[:, s:e]
+
+    if baseline is not None:
+        y = remove_baseline(f, y, f0, baseline, core_width)
+
+    if average > 1:
+        n = len(f) // average * average
+        f = f[:n].reshape(-1, average).mean(axis=1)
+        y = y[:, :n].reshape(len(y), -1, average).mean(axis=2)
+
+    if normalise:
+        minval = y.min(axis=1, keepdims=True)
+        y = (y - minval) / (y.max(axis=1, keepdims=True) - minval)
+
+    return {"f": f, "y": y}
+
+
+def read_spectra(paths) -> dict:
+    """Function to read measured spectra into one stack
+
+    Args:
+        paths: Paths to RPG FFTS files with the same frequency array
+
+    Returns:
+        Dictionary with 'f', the spectra 'y' of shape (n_files, n_channels)
+        and the 'azimuth' and 'za' of every file
+
+    Raises:
+        ValueError: Raised if the frequency arrays differ
+    """
+    files = [LazyHDF5(path) for path in paths]
+    try:
+        f = np.array(files[0]["f"])
+        for file in files[1:]:
+            if not np.array_equal(file["f"], f):
+                raise ValueError(f"Frequencies of '{file.filename}' differ from '{files[0].filename}'")
+        return {
+            "f": f,
+            "y": np.stack([file["y"] for file in files]),
+            "azimuth": np.array([file["azimuth"] for file in files]),
+            "za": np.array([file["za"] for file in files]),
+        }
+    finally:
+        for file in files:
+            file.close()
+
+
+def preprocess_measurements(paths, **settings) -> dict:
+    """Function to preprocess measurement files with caching
+
+    The result is kept in 'data/cache/preprocessed', keyed by the
+    paths, modification times and sizes of the files and the settings,
+    so plotting and retrievals share one preprocessing of the data
+
+    Args:
+        paths: Paths to RPG FFTS files
+        settings: Keyword arguments of 'preprocess'
+
+    Returns:
+        Dictionary with 'f', 'y', 'azimuth' and 'za', with one row of
+        'y' per file in the order of 'paths'
+    """
+    paths = [str(path) for path in paths]
+    signature = [(path, os.stat(path).st_mtime_ns, os.stat(path).st_size) for path in paths]
+    key = make_key(kind="preprocess", signature=signature, settings=sorted(settings.items()))
+
+    cache = ResultCache(directory=find_dir(dirname="cache") / "preprocessed")
+    entry = cache.get(key)
+    if entry is not None:
+        return entry
+
+    spectra = read_spectra(paths)
+    result = preprocess(spectra["f"], spectra["y"], **settings)
+    result.update(azimuth=spectra["azimuth"], za=spectra["za"])
+    cache.put(key, **result)
+    return result
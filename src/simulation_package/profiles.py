@@ -0,0 +1,172 @@
+from datetime import datetime
+from pathlib import Path
+
+import h5py
+import numpy as np
+import pyarts
+
+from simulation_package.files import find_dir, find_file
+
+MONTHS = ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec")
+
+
+def to_datetime64(timestamp) -> np.datetime64:
+    """Function to convert a timestamp
+
+    Args:
+        timestamp: datetime, numpy datetime64 or ISO string such as
+            '2024-01-04 18:00:00'
+
+    Returns:
+        Timestamp with second resolution
+    """
+    if isinstance(timestamp, str):
+        timestamp = timestamp.replace(" ", "T")
+    return np.datetime64(timestamp, "s")
+
+
+def _field_profile(path: Path) -> np.ndarray:
+    return np.asarray(pyarts.xml.load(str(path)).to_dict()["data"])[:, 0, 0]
+
+
+def build_profile_store(source=None, filename: str = "profiles.hdf5") -> Path:
+    """Function to build the profile store from ECMWF XML files
+
+    Collects every '<yymmddhh>_t.xml' and '<yymmddhh>_z.xml' pair in
+    'source' together with the monthly a priori 'ECMWF_<mon>.xml' and
+    writes them sorted by time to one HDF5 file with one chunk per
+    profile, so single profiles and time ranges can be read without
+    loading the whole store
+
+    Args:
+        source: Directory with the XML files, 'assets/grids' if not given
+        filename: Save name of the store
+
+    Returns:
+        Path to the store
+
+    Raises:
+        FileNotFoundError: Raised if there are no profiles or an a priori
+        file is missing
+    """
+    if source is None:
+        source = find_file(filename="p_grid_137.xml", skip="local").parent
+    source = Path(source)
+
+    tfiles = sorted(source.glob("*_t.xml"))
+    if not tfiles:
+        raise FileNotFoundError(f"Can not find temperature profiles in '{source}'")
+
+    times, temperature, altitude, apriori = [], [], [], []
+    aprioris = {}
+    for tfile in tfiles:
+        stamp = tfile.name.removesuffix("_t.xml")
+        time = datetime.strptime(stamp, "%y%m%d%H")
+        month = MONTHS[time.month - 1]
+        if month not in aprioris:
+            afile = source / f"ECMWF_{month}.xml"
+            if not afile.exists():
+                raise FileNotFoundError(f"Can not find file '{afile.name}'")
+            aprioris[month] = np.asarray(pyarts.xml.load(str(afile)))
+
+        times.append(np.datetime64(time, "s").astype(np.int64))
+        temperature.append(_field_profile(tfile))
+        altitude.append(_field_profile(source / f"{stamp}_z.xml"))
+        apriori.append(aprioris[month])
+
+    order = np.argsort(times)
+    pressure = np.asarray(pyarts.xml.load(str(source / "p_grid_137.xml")))
+    plen = len(pressure)
+
+    savepath = find_dir(dirname="profiles")
+    with h5py.File(savepath / filename, "w") as file:
+        file["time"] = np.asarray(times)[order]
+        file["pressure"] = pressure
+        for key, value in (("temperature", temperature), ("altitude", altitude), ("apriori", apriori)):
+            file.create_dataset(key, data=np.asarray(value)[order], chunks=(1, plen))
+
+    print(f"Saved {len(times)} profiles in {savepath / filename}")
+    return savepath / filename
+
+
+class ProfileStore:
+    """Class to read profiles from the profile store
+
+    Only the time axis is read when the store is opened, profiles are
+    read from disk when they are selected
+
+    Args:
+        filename: Path to the store, 'data/profiles/profiles.hdf5' if not given
+    """
+
+    def __init__(self, filename=None):
+        if filename is None:
+            filename = find_dir(dirname="profiles") / "profiles.hdf5"
+        self.file = h5py.File(filename, "r")
+        self.times = self.file["time"][:].astype("datetime64[s]")
+        self.pressure = self.file["pressure"][:]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return len(self.times)
+
+    def _read(self, selection) -> dict:
+        return {
+            "time": self.times[selection],
+            "temperature": self.file["temperature"][selection],
+            "altitude": self.file["altitude"][selection],
+            "apriori": self.file["apriori"][selection],
+            "pressure": self.pressure,
+        }
+
+    def select(self, start, end) -> dict:
+        """Select all profiles in a time range
+
+        Args:
+            start: First time of the range
+            end: Last time of the range, inclusive
+
+        Returns:
+            Dictionary with time and (ntime, plen) arrays
+        """
+        s = np.searchsorted(self.times, to_datetime64(start), side="left")
+        e = np.searchsorted(self.times, to_datetime64(end), side="right")
+        return self._read(slice(s, e))
+
+    def nearest(self, timestamp) -> dict:
+        """Select the profile closest in time
+
+        Args:
+            timestamp: Time of interest
+
+        Returns:
+            Dictionary with time and (plen,) arrays
+        """
+        target = to_datetime64(timestamp)
+        i = np.searchsorted(self.times, target)
+        candidates = [j for j in (i - 1, i) if 0 <= j < len(self.times)]
+        index = min(candidates, key=lambda j: abs(self.times[j] - target))
+        return self._read(index)
+
+    def close(self):
+        self.file.close()
+
+
+def load_profile(timestamp) -> dict:
+    """Function to load the grids closest to a timestamp
+
+    Args:
+        timestamp: Time of interest
+
+    Returns:
+        Dictionary with altitude, temperature, pressure and apriori
+    """
+    with ProfileStore() as store:
+        profile = store.nearest(timestamp)
+    print(f"Using profile from {profile.pop('time')} for {timestamp}")
+    return profile
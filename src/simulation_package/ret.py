@@ -1,10 +1,19 @@
 from simulation_package.retrieval import Retrieval
+from simulation_package.parallel import run_jobs
 
 
-# run retrieval
-def ret():
-    kimra_zeeman = Retrieval(line="kimra", recalc=True, zeeman=True)
-    kimra_zeeman.do_OEM(filename="234GHz_zeeman.hdf5")
+def run_retrieval(line, filename, recalc=False, zeeman=True, lookup=False):
+    retrieval = Retrieval(line=line, recalc=recalc, zeeman=zeeman, lookup=lookup)
+    retrieval.do_OEM(filename=filename)
+
 
-    tempera_zeeman= Retrieval(line="tempera", recalc=True, zeeman=True)
-    tempera_zeeman.do_OEM(filename="53GHz_zeeman.hdf5")
+# run retrieval
+def ret(jobs=1, lookup=False):
+    run_jobs(
+        run_retrieval,
+        {
+            "kimra": {"line": "kimra", "filename": "234GHz_zeeman.hdf5", "lookup": lookup},
+            "tempera": {"line": "tempera", "filename": "53GHz_zeeman.hdf5", "lookup": lookup},
+        },
+        workers=jobs,
+    )
@@ -23,6 +23,24 @@ def calc_mr(avk: np.ndarray) -> np.ndarray:
     return np.array(mr)
 
 
+def read_retrieval(filename, selections: dict) -> dict:
+    """Function to read parts of a retrieval
+
+    Only the selected parts of the datasets are read and the file is
+    closed before returning
+
+    Args:
+        filename: Path to the retrieval
+        selections: Dictionary with dataset name as key and index or
+            tuple of slices as value
+
+    Returns:
+        Dictionary with the selected data
+    """
+    with read_hdf5(filename=filename, lazy=True) as file:
+        return {key: file.read(key, selection) for key, selection in selections.items()}
+
+
 def spec_and_fit_plot():
     """Function to plot spectra and fit"""
     legend_fontsize = 12
@@ -30,8 +48,9 @@ def spec_and_fit_plot():
     ticksize = 14
     kimra_file = find_retrieval(name="234GHz_zeeman.hdf5")
     tempera_file = find_retrieval(name="53GHz_zeeman.hdf5")
-    kimra = read_hdf5(filename=kimra_file)
-    tempera = read_hdf5(filename=tempera_file)
+    selections = {"f_grid": (), "y": (), "yf": ()}
+    kimra = read_retrieval(kimra_file, selections)
+    tempera = read_retrieval(tempera_file, selections)
 
     fig = plt.figure(figsize=(16, 7))
     gs = GridSpec(2, 2, height_ratios=[2, 1], wspace=0.5)
@@ -173,10 +192,11 @@ def avk_plot():
     kimra_file = find_retrieval(name="234GHz_zeeman.hdf5")
     tempera_file = find_retrieval(name="53GHz_zeeman.hdf5")
 
-    kimra = read_hdf5(filename=kimra_file)
-    tempera = read_hdf5(filename=tempera_file)
-    z = kimra["z_field"][:, 0, 0]
-    assert np.all(z == tempera["z_field"][:, 0, 0]), "Check altitude"
+    selections = {"z_field": np.s_[:, 0, 0], "avk": np.s_[0:plen, 0:plen]}
+    kimra = read_retrieval(kimra_file, selections)
+    tempera = read_retrieval(tempera_file, selections)
+    z = kimra["z_field"]
+    assert np.all(z == tempera["z_field"]), "Check altitude"
 
     mr_kimra = calc_mr(kimra["avk"][0:plen, 0:plen])
     mr_tempera = calc_mr(tempera["avk"][0:plen, 0:plen])
@@ -264,13 +284,14 @@ def jac_plot():
     kimra_file = find_retrieval(name="234GHz_zeeman.hdf5")
     tempera_file = find_retrieval(name="53GHz_zeeman.hdf5")
 
-    kimra = read_hdf5(filename=kimra_file)
-    tempera = read_hdf5(filename=tempera_file)
+    selections = {"z_field": np.s_[:, 0, 0], "jacobian": np.s_[:, 0:plen]}
+    kimra = read_retrieval(kimra_file, selections)
+    tempera = read_retrieval(tempera_file, selections)
 
     kimra_jac = kimra["jacobian"][:, 0:plen]
     tempera_jac = tempera["jacobian"][:, 0:plen]
-    z = kimra["z_field"][:, 0, 0]
-    assert np.all(z == tempera["z_field"][:, 0, 0]), "Check altitude"
+    z = kimra["z_field"]
+    assert np.all(z == tempera["z_field"]), "Check altitude"
     z = z / 1e3
 
     kimra_max = []
@@ -303,13 +324,14 @@ def jac_mr_plot():
     kimra_file = find_retrieval(name="234GHz_zeeman.hdf5")
     tempera_file = find_retrieval(name="53GHz_zeeman.hdf5")
 
-    kimra = read_hdf5(filename=kimra_file)
-    tempera = read_hdf5(filename=tempera_file)
+    selections = {"z_field": np.s_[:, 0, 0], "jacobian": np.s_[:, 0:plen], "avk": np.s_[0:plen, 0:plen]}
+    kimra = read_retrieval(kimra_file, selections)
+    tempera = read_retrieval(tempera_file, selections)
 
     kimra_jac = kimra["jacobian"][:, 0:plen]
     tempera_jac = tempera["jacobian"][:, 0:plen]
-    z = kimra["z_field"][:, 0, 0]
-    assert np.all(z == tempera["z_field"][:, 0, 0]), "Check altitude"
+    z = kimra["z_field"]
+    assert np.all(z == tempera["z_field"]), "Check altitude"
     z = z / 1e3
 
     kimra_max = []
@@ -353,12 +375,13 @@ def jac_pcolormesh():
     plen = 137
     tempera_file = find_retrieval(name="53GHz_zeeman.hdf5")
     kimra_file = find_retrieval(name="234GHz_zeeman.hdf5")
-    tempera = read_hdf5(tempera_file)
-    kimra = read_hdf5(kimra_file)
+    selections = {"z_field": np.s_[:, 0, 0], "jacobian": np.s_[:, 0:plen], "f_grid": ()}
+    tempera = read_retrieval(tempera_file, selections)
+    kimra = read_retrieval(kimra_file, selections)
 
     jacobian_tempera = tempera["jacobian"][:, 0:plen]
     jacobian_kimra = kimra["jacobian"][:, 0:plen]
-    z = tempera["z_field"][:, 0, 0] / 1e3
+    z = tempera["z_field"] / 1e3
     f_tempera = tempera["f_grid"] / 1e9
     f_kimra = kimra["f_grid"] / 1e9
 
@@ -1,33 +1,250 @@
+import contextlib
 import pyarts
 import numpy as np
 import h5py
 import os
-from simulation_package.files import find_file, find_dir
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from scipy import sparse
+from simulation_package import covariance
+from simulation_package.files import find_dir
 from simulation_package.make_grids import make_atm_grids
-from simulation_package.hdf import read_hdf5, DottedDict
+from simulation_package.hdf import Variable, write_dataset
+from simulation_package.frequency import LINES, adaptive_grid, interpolate, uniform_grid
+from simulation_package.lookup import set_abs_lookup
+from simulation_package.catalogue import load_lines
+from simulation_package.cache import ResultCache, file_hash, make_key
+
+
+LM_GA_SETTINGS = [200, 3, 1.5, 300, 5, 20]
+NOISE_STD = 0.1667
+PRODUCTS = ("x", "y", "yf", "avk", "retrieval_ss", "retrieval_eo", "oem_diagnostics")
 
 
 class Retrieval:
-    def __init__(self, line, start=0, recalc=False, zeeman=True):
+    """Class for a temperature retrieval of one line
+
+    The setup is split into stages that are run in order when a later
+    stage needs them, see STAGES. The atmospheric fields, the HSE
+    altitudes, the covariance blocks and the sensor response are kept
+    as checkpoints in 'data/cache/retrieval', keyed by the settings of
+    the retrieval, so a new session only recalculates what has changed.
+    Within a session a new measurement ('set_measurement') or new
+    'lm_ga_settings' only rerun the OEM
+
+    Args:
+        line: Name of the line, 'kimra' or 'tempera'
+        start: Index of the temperature profile
+        recalc: Boolean if the lines should be read from the catalogue
+        zeeman: Boolean if Zeeman splitting should be used
+        cache: Boolean if the result cache should be used for yCalc
+        grid: 'uniform' or 'adaptive' frequency grid
+        lookup: Boolean if an absorption lookup table should be used
+        profile_time: Timestamp of the profile from the profile store
+        policy: OutputPolicy of the saved datasets
+        checkpoint: Boolean if stages should be checkpointed on disk
+        y: Measured spectrum, a noisy simulation is used if not given
+        sa_corr_length: Correlation length in m of the a priori
+            temperature covariance, diagonal if not given
+        seed: Seed of the noise of the simulated measurement
+        time: Time of the workspace, used for the IGRF magnetic field
+        save_simulation: Boolean if the simulated spectrum should be saved
+            with 'save_ycalc', off for workers that run in parallel
+    """
+
+    STAGES = ("workspace", "atmosphere", "hse", "simulation", "covariance", "sensor")
+
+    def __init__(
+        self,
+        line,
+        start=0,
+        recalc=False,
+        zeeman=True,
+        cache=True,
+        grid="uniform",
+        lookup=False,
+        profile_time=None,
+        policy=None,
+        checkpoint=True,
+        y=None,
+        sa_corr_length=None,
+        seed=None,
+        time="2024-01-04 19:00:00",
+        save_simulation=True,
+    ):
         self.arts = pyarts.workspace.Workspace()
         self.line = line
+        self.start_index = start
+        self.recalc = recalc
         self.zeeman = zeeman
+        self.grid = grid
+        self.lookup = lookup
+        self.profile_time = profile_time
+        self.policy = policy
+        self.checkpoint = checkpoint
+        self.sa_corr_length = sa_corr_length
+        self.time = time
+        self.save_simulation = save_simulation
+        self.rng = np.random.default_rng(seed)
+        self.cache = ResultCache() if cache else None
+        self.done = set()
+        self.y = None
+        self.oem_log = []
+        self.converged = None
+        if y is not None:
+            self.set_measurement(y)
+
+    def require(self, stage):
+        """Run a stage and all stages before it that have not been run
+
+        Args:
+            stage: Name of the stage, one of STAGES
+        """
+        for name in self.STAGES[: self.STAGES.index(stage) + 1]:
+            if name not in self.done:
+                t0 = time.perf_counter()
+                getattr(self, f"stage_{name}")()
+                self.done.add(name)
+                print(f"{self.line}: stage '{name}' done in {time.perf_counter() - t0:.1f} s")
+
+    def set_measurement(self, y):
+        """Set the measurement used by the next OEM
+
+        Args:
+            y: Measured spectrum on the backend channels
+        """
+        self.y = np.asarray(y, dtype=float)
+        # a measurement replaces the simulated one
+        if "covariance" not in self.done:
+            self.done.add("simulation")
+
+    def stage_workspace(self):
         self.set_arts_path()
         self.set_frequency_grid()
         self.set_species()
-        self.set_atm_grids(start)
+        self.set_atm_grids(self.start_index)
         self.set_agendas()
         self.radiative_transfer()
         self.set_geometry()
-        self.set_abs_file()
-        self.propmat(recalc=recalc)
+        self.propmat(recalc=self.recalc)
+
+    def stage_atmosphere(self):
+        # the magnetic field depends on the time, so it is not checkpointed
+        fields = ["t_field", "z_field", "vmr_field"]
+        if not self.load_checkpoint("atmosphere", fields):
+            self.set_atm_fields()
+            self.save_checkpoint("atmosphere", fields)
+        self.arts.MagFieldsCalcIGRF()
+        self.set_surface_and_sensor_pos()
         self.check_calc()
-        self.apply_hse()
-        self.do_yCalc(recalc=recalc)
-        self.init_retrieval()
+        self.use_abs_lookup()
+
+    def stage_hse(self):
+        # the HSE settings are used again by the retrieval, only z_field is checkpointed
+        self.set_hse()
+        if not self.load_checkpoint("hse", ["z_field"]):
+            self.arts.z_fieldFromHSE()
+            self.save_checkpoint("hse", ["z_field"])
+
+    def stage_simulation(self):
+        self.do_yCalc(save=self.save_simulation)
+        self.y_true = self.simulated_spectrum()
+        self.y = self.simulated_measurement()
+
+    def stage_covariance(self):
         self.set_errors()
+
+    def stage_sensor(self):
         self.config_sensor_and_iter_agendas()
 
+    def checkpoint_path(self):
+        """Function to get the checkpoint directory of the retrieval
+
+        Returns:
+            Directory named after the settings that the checkpoints depend on
+        """
+        key = make_key(
+            kind="retrieval_checkpoint",
+            line=self.line,
+            zeeman=self.zeeman,
+            grid=self.grid,
+            f_grid=self.arts.f_grid.value,
+            f_backend=self.f_backend,
+            species=self.species,
+            pressure=self.atm.pressure,
+            temperature=self.atm.temperature,
+            apriori=self.atm.apriori,
+            lines=file_hash(self.abs_lines_per_species_file),
+            lookup=self.lookup,
+            sa_corr_length=self.sa_corr_length,
+        )
+        return find_dir(dirname="cache") / "retrieval" / key
+
+    def save_checkpoint(self, stage, names):
+        """Save workspace variables of a stage as binary ARTS XML
+
+        The files are written to a temporary directory that is renamed
+        to the stage when complete, so other workers never read a
+        partial checkpoint. Nothing is written if the stage already has
+        a checkpoint
+
+        Args:
+            stage: Name of the stage
+            names: Names of the workspace variables
+        """
+        if not self.checkpoint:
+            return
+        with self._checkpoint_dir(stage) as tmp:
+            if tmp is None:
+                return
+            for name in names:
+                self.arts.WriteXML(
+                    output_file_format="binary",
+                    input=getattr(self.arts, name),
+                    filename=str(tmp / f"{name}.xml"),
+                )
+
+    @contextlib.contextmanager
+    def _checkpoint_dir(self, stage):
+        target = self.checkpoint_path() / stage
+        if target.exists():
+            yield None
+            return
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(prefix=f".{stage}.", dir=target.parent))
+        try:
+            yield tmp
+            try:
+                os.rename(tmp, target)
+            except OSError:
+                # another worker saved the stage first
+                if not target.exists():
+                    raise
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def load_checkpoint(self, stage, names):
+        """Load workspace variables of a stage
+
+        Args:
+            stage: Name of the stage
+            names: Names of the workspace variables
+
+        Returns:
+            Boolean if the checkpoint was loaded
+        """
+        if not self.checkpoint:
+            return False
+        path = self.checkpoint_path() / stage
+        if not path.exists():
+            return False
+        for name in names:
+            self.arts.ReadXML(getattr(self.arts, name), str(path / f"{name}.xml"))
+        print(f"{self.line}: using checkpoint of stage '{stage}'")
+        return True
+
     def set_arts_path(self):
         home = os.getenv("HOME")
         arts_catalogue_path = f"{home}/.cache/arts/"
@@ -40,21 +257,25 @@ class Retrieval:
 
     def set_frequency_grid(self):
         self.flen = 5000
+        f0 = LINES[self.line]
 
-        match self.line:
-            case "tempera":
-                f0 = 53.066906e9
-                f = np.linspace(f0-300e6, f0+300e6, self.flen)
-            case "kimra":
-                f0 = 233.9461e9
-                f = np.linspace(f0 - 300e6, f0 + 300e6, self.flen)
+        # channels of the measurement
+        self.f_backend = uniform_grid(f0, 300e6, self.flen)
+        df = self.f_backend[1] - self.f_backend[0]
+
+        match self.grid:
+            case "uniform":
+                f = self.f_backend
+            case "adaptive":
+                # covers the outermost channels, which are integrated by the backend
+                f = adaptive_grid(f0, 300e6 + df, df_min=df / 2, df_max=2e6, channels=self.f_backend)
 
         self.start = f[0]
         self.stop = f[-1]
         self.arts.f_grid = f
 
     def set_atm_grids(self, start):
-        self.atm = make_atm_grids(start)
+        self.atm = make_atm_grids(start, timestamp=self.profile_time)
 
     def set_geometry(self):
         self.arts.PlanetSet(option="Earth")
@@ -65,6 +286,18 @@ class Retrieval:
         self.arts.p_grid = self.atm.pressure
         self.arts.lat_grid = np.linspace(55, 75)
         self.arts.lon_grid = np.linspace(10, 30)
+
+        if self.zeeman:
+            self.arts.stokes_dim = 4
+        else:
+            self.arts.stokes_dim = 1
+
+        self.arts.sensor_los = [[77.6, 90]]
+        self.arts.f_backend = self.f_backend
+        self.arts.Touch(self.arts.sensor_time)
+        self.arts.sensorOff()
+
+    def set_atm_fields(self):
         self.arts.AtmRawRead(
             basename=f"{self.arts_xml_directory}/planets/Earth/Fascod/subarctic-winter/subarctic-winter"
         )
@@ -76,44 +309,32 @@ class Retrieval:
 
         self.arts.t_field_raw = data
         self.arts.AtmFieldsCalcExpand1D()
-        self.arts.MagFieldsCalcIGRF()
+
+    def set_surface_and_sensor_pos(self):
         self.z0 = min(self.arts.z_field.value[:, :, :].flatten())
         self.arts.z_surfaceConstantAltitude(altitude=self.z0 + 1)
         self.arts.t_surface = self.atm.temperature[1] + np.ones_like(
             self.arts.z_surface.value
         )
-
-        if self.zeeman:
-            self.arts.stokes_dim = 4
-        else:
-            self.arts.stokes_dim = 1
-
         self.arts.sensor_pos = [[self.z0 + 20, 67.84, 20.22]]
-        self.arts.sensor_los = [[77.6, 90]]
-        self.arts.f_backend = self.arts.f_grid
-        self.arts.Touch(self.arts.sensor_time)
-        self.arts.sensorOff()
 
     def set_species(self):
         if self.zeeman:
-            self.arts.abs_speciesSet(
-                species=[
-                    f"O2-Z-*-{self.start - 1}-{self.stop + 1}",
-                    f"O2-*-{self.start - 1}-{self.stop + 1}",
-                    f"O3-*-{self.start - 1}-{self.stop + 1}",
-                    "N2-SelfContStandardType",
-                    "H2O-PWR98",
-                ]
-            )
+            self.species = [
+                f"O2-Z-*-{self.start - 1}-{self.stop + 1}",
+                f"O2-*-{self.start - 1}-{self.stop + 1}",
+                f"O3-*-{self.start - 1}-{self.stop + 1}",
+                "N2-SelfContStandardType",
+                "H2O-PWR98",
+            ]
         else:
-            self.arts.abs_speciesSet(
-                species=[
-                    f"O2-*-{self.start - 1}-{self.stop + 1}",
-                    f"O3-*-{self.start - 1}-{self.stop + 1}",
-                    "N2-SelfContStandardType",
-                    "H2O-PWR98",
-                ]
-            )
+            self.species = [
+                f"O2-*-{self.start - 1}-{self.stop + 1}",
+                f"O3-*-{self.start - 1}-{self.stop + 1}",
+                "N2-SelfContStandardType",
+                "H2O-PWR98",
+            ]
+        self.arts.abs_speciesSet(species=self.species)
 
     def set_agendas(self):
         self.arts.water_p_eq_agendaSet(option="MK05")
@@ -131,32 +352,20 @@ class Retrieval:
         self.arts.rt_integration_option = "default"
         self.arts.rte_alonglos_v = 0.0
         self.arts.jacobianOff()
-        self.arts.Touch(self.arts.time)
+        # a touched time is the wall clock, which would change the field between runs
+        self.arts.time = pyarts.arts.Time(self.time)
         self.arts.cloudboxOff()
         self.arts.nlteOff()
 
-    def set_abs_file(self):
-        match self.line:
-            case "tempera":
-                self.abs_lines_per_species_file = find_file(filename="tempera.xml")
-            case "kimra":
-                self.abs_lines_per_species_file = find_file(filename="kimra.xml")
-
     def propmat(self, recalc=False):
         if recalc:
             print(f"recalculating abs_lines for {self.line} line")
-            self.arts.abs_lines_per_speciesReadSpeciesSplitCatalog(
-                basename=f"{self.arts_catalogue_directory}/lines/"
-            )
-            self.arts.WriteXML(
-                input=self.arts.abs_lines_per_species,
-                output_file_format="binary",
-                filename=str(self.abs_lines_per_species_file),
-            )
-        else:
-            self.arts.ReadXML(
-                self.arts.abs_lines_per_species, str(self.abs_lines_per_species_file)
-            )
+        self.abs_lines_per_species_file = load_lines(
+            ws=self.arts,
+            species=self.species,
+            catalogue_directory=self.arts_catalogue_directory,
+            refresh=recalc,
+        )
         self.arts.propmat_clearsky_agendaAuto()
 
     def check_calc(self):
@@ -167,18 +376,57 @@ class Retrieval:
         self.arts.sensor_checkedCalc()
         self.arts.propmat_clearsky_agenda_checkedCalc()
 
-    def apply_hse(self):
+    def use_abs_lookup(self):
+        if self.lookup:
+            set_abs_lookup(ws=self.arts, species=self.species)
+
+    def set_hse(self):
         self.arts.p_hse = self.atm.pressure[1]
         self.arts.z_hse_accuracy = 10
+
+    def apply_hse(self):
+        self.set_hse()
         self.arts.z_fieldFromHSE()
 
-    def do_yCalc(self, recalc=False):
+    def ycalc_key(self):
+        return make_key(
+            kind="retrieval",
+            f_grid=self.arts.f_grid.value,
+            f_backend=self.f_backend,
+            species=self.species,
+            pressure=self.atm.pressure,
+            temperature=self.atm.temperature,
+            z_field=self.arts.z_field.value,
+            sensor_pos=self.arts.sensor_pos.value,
+            sensor_los=self.arts.sensor_los.value,
+            time=self.time,
+            stokes_dim=self.arts.stokes_dim.value,
+            lines=file_hash(self.abs_lines_per_species_file),
+            lookup=self.lookup,
+        )
+
+    def do_yCalc(self, save=True):
         self.ycalc_path = find_dir(dirname="simulation")
         self.ycalc_file_path = f"{self.ycalc_path}/retrieval_yc.hdf5"
 
-        if recalc:
+        key = self.ycalc_key()
+        entry = None if self.cache is None else self.cache.get(key)
+        if entry is None:
             print(f"Start ycalc for {self.line} line")
             self.arts.yCalc()
+            if self.grid != "uniform":
+                stokes_dim = self.arts.stokes_dim.value
+                y = self.arts.y.value.reshape(-1, stokes_dim)
+                self.arts.y = interpolate(self.arts.f_grid.value, y, self.f_backend).flatten()
+            if self.cache is not None:
+                self.cache.put(key, y=self.arts.y.value)
+        else:
+            print(f"Using cached ycalc for {self.line} line")
+            self.arts.y = entry["y"]
+
+        if self.cache is not None:
+            print(self.cache.report())
+        if save:
             self.save_ycalc()
 
     def save_ycalc(self):
@@ -190,51 +438,107 @@ class Retrieval:
             Q = self.arts.y.value[1::4]
             U = self.arts.y.value[2::4]
             V = self.arts.y.value[3::4]
-            f = self.arts.f_grid.value
+            f = self.f_backend
 
             self.ycalc_file_path = f"{self.ycalc_path}/{self.line}.hdf5"
             y = I - Q
 
             with h5py.File(self.ycalc_file_path, "w") as file:
-                file["I"] = I
-                file["Q"] = Q
-                file["U"] = U
-                file["V"] = V
-                file["f"] = f
-                file["y"] = y
+                for name, value in (("I", I), ("Q", Q), ("U", U), ("V", V), ("f", f), ("y", y)):
+                    write_dataset(file, name, value, self.policy)
         else:
-            f = self.arts.f_grid.value
+            f = self.f_backend
             y = self.arts.y.value
             with h5py.File(self.ycalc_file_path, "w") as file:
-                file["y"] = y
-                file["f"] = f
+                write_dataset(file, "y", y, self.policy)
+                write_dataset(file, "f", f, self.policy)
 
-    def init_retrieval(self):
-        self.arts.retrievalDefInit()
-        ycalc = DottedDict(read_hdf5(filename=self.ycalc_file_path))
-        noise = np.random.normal(loc=0, scale=0.1667, size=ycalc.y.shape)
-        y = ycalc.y + noise
-        self.arts.y = y
+    def simulated_spectrum(self):
+        """Function to get the simulated spectrum as seen by the instrument
+
+        Returns:
+            I - Q on the backend channels with Zeeman splitting, else y
+        """
+        y = np.array(self.arts.y.value)
+        if self.zeeman:
+            return y[0::4] - y[1::4]
+        return y
+
+    def simulated_measurement(self, rng=None):
+        """Function to add one noise realisation to the simulated spectrum
+
+        Args:
+            rng: Random number generator, the one of the retrieval if not given
+
+        Returns:
+            Simulated measurement
+        """
+        rng = self.rng if rng is None else rng
+        return self.y_true + rng.normal(loc=0, scale=NOISE_STD, size=self.y_true.shape)
+
+    def init_retrieval(self, x=None):
+        self.arts.y = self.y
         self.arts.yf = []
-        self.arts.x = []
+        self.arts.x = [] if x is None else x
         self.arts.jacobian = []
-        self.arts.xa = self.atm.apriori
+        # apriori of the temperature and the baseline fit
+        self.arts.xa = np.append(self.atm.apriori, [0, 0])
+
+    def covariance_blocks(self):
+        """Function to get the covariance blocks of the retrieval
+
+        The blocks are built as sparse matrices. The a priori is
+        diagonal, or exponentially correlated in altitude with its
+        exact tridiagonal inverse if 'sa_corr_length' is set
+
+        Returns:
+            Dictionary with the a priori temperature covariance and its
+            inverse, the measurement covariance and the covariances of
+            the baseline fit
+        """
+        names = ("sa", "sa_inv", "se", "baseline")
+        path = self.checkpoint_path() / "covariance" if self.checkpoint else None
+        if path is not None and path.exists():
+            print(f"{self.line}: using checkpoint of stage 'covariance'")
+            return {name: sparse.load_npz(path / f"{name}.npz") for name in names}
+
+        # apriori error
+        if self.sa_corr_length is None:
+            sa = covariance.diagonal(100, self.atm.plen)
+            sa_inv = covariance.diagonal(1 / 100, self.atm.plen)
+        else:
+            # no cutoff, the tridiagonal inverse is only exact for the full matrix
+            sa = covariance.exponential(self.atm.altitude, 100, self.sa_corr_length, cutoff=0.0)
+            sa_inv = covariance.exponential_inverse(self.atm.altitude, 100, self.sa_corr_length)
+
+        blocks = {
+            "sa": sa,
+            "sa_inv": sa_inv,
+            "se": covariance.diagonal(1, self.flen),
+            "baseline": covariance.diagonal([100, 25]),
+        }
+        if path is not None:
+            with self._checkpoint_dir("covariance") as tmp:
+                if tmp is not None:
+                    for name, block in blocks.items():
+                        sparse.save_npz(tmp / f"{name}.npz", block)
+        return blocks
 
     def set_errors(self):
+        blocks = self.covariance_blocks()
+        self.arts.retrievalDefInit()
+
         # apriori error
-        Sa = np.zeros(shape=(self.atm.plen)) + 100
         self.arts.retrievalAddTemperature(
-            covmat_block=np.diag(Sa),
-            covmat_inv_block=np.diag(1 / Sa),
+            covmat_block=covariance.to_arts(blocks["sa"]),
+            covmat_inv_block=covariance.to_arts(blocks["sa_inv"]),
             g1=self.atm.pressure,
             g2=[67.84],
             g3=[20.22],
         )
 
         # measurement error
-        self.arts.covmat_seSet(
-            covmat=pyarts.arts.Sparse(np.diag(np.zeros(shape=(self.flen)) + 1))
-        )
+        self.arts.covmat_seSet(covmat=covariance.to_arts(blocks["se"]))
 
         # Baseline Fit
         self.arts.retrievalAddPolyfit(
@@ -246,27 +550,26 @@ class Retrieval:
         )
 
         # Add Baseline error to S_a
-        self.arts.covmat_sxAddBlock(
-            block=pyarts.arts.Sparse(np.diag(np.zeros(shape=(1)) + 100))
-        )
-        self.arts.covmat_sxAddInverseBlock(
-            block=pyarts.arts.Sparse(np.diag(np.zeros(shape=(1)) + 1 / 100))
-        )
-        self.arts.covmat_sxAddBlock(
-            block=pyarts.arts.Sparse(np.diag(np.zeros(shape=(1)) + 25))
-        )
-        self.arts.covmat_sxAddInverseBlock(
-            block=pyarts.arts.Sparse(np.diag(np.zeros(shape=(1)) + 1 / 25))
-        )
-
-        # Add apriori baseline to xa
-        self.arts.xa = np.append(self.arts.xa.value, [0, 0])
+        for variance in blocks["baseline"].diagonal():
+            self.arts.covmat_sxAddBlock(block=covariance.to_arts(covariance.diagonal([variance])))
+            self.arts.covmat_sxAddInverseBlock(block=covariance.to_arts(covariance.diagonal([1 / variance])))
 
         # close definition of retrieval
         self.arts.retrievalDefClose()
 
     def config_sensor_and_iter_agendas(self):
-        if self.zeeman:
+        if self.grid != "uniform":
+            self.arts.backend_channel_responseFlat(resolution=self.f_backend[1] - self.f_backend[0])
+
+        if self.zeeman and self.grid != "uniform":
+
+            @pyarts.workspace.arts_agenda(ws=self.arts, set_agenda=True)
+            def sensor_response_agenda(ws):
+                ws.AntennaOff()
+                ws.sensor_responseInit(sensor_norm=1)
+                ws.sensor_responsePolarisation(instrument_pol=[6])
+                ws.sensor_responseBackend()
+        elif self.zeeman:
 
             @pyarts.workspace.arts_agenda(ws=self.arts, set_agenda=True)
             def sensor_response_agenda(ws):
@@ -274,6 +577,13 @@ class Retrieval:
                 ws.Ignore(ws.f_backend)
                 ws.sensor_responseInit(sensor_norm=1)
                 ws.sensor_responsePolarisation(instrument_pol=[6])
+        elif self.grid != "uniform":
+
+            @pyarts.workspace.arts_agenda(ws=self.arts, set_agenda=True)
+            def sensor_response_agenda(ws):
+                ws.AntennaOff()
+                ws.sensor_responseInit(sensor_norm=1)
+                ws.sensor_responseBackend()
         else:
 
             @pyarts.workspace.arts_agenda(ws=self.arts, set_agenda=True)
@@ -282,7 +592,19 @@ class Retrieval:
                 ws.Ignore(ws.f_backend)
                 ws.sensor_responseInit(sensor_norm=1)
 
-        self.arts.sensor_response_agenda.value.execute(self.arts)
+        response = [
+            "sensor_response",
+            "sensor_response_f",
+            "sensor_response_pol",
+            "sensor_response_dlos",
+            "sensor_response_f_grid",
+            "sensor_response_pol_grid",
+            "sensor_response_dlos_grid",
+            "mblock_dlos",
+        ]
+        if not self.load_checkpoint("sensor", response):
+            self.arts.sensor_response_agenda.value.execute(self.arts)
+            self.save_checkpoint("sensor", response)
 
         @pyarts.workspace.arts_agenda(ws=self.arts, set_agenda=True)
         def inversion_iterate_agenda(ws):
@@ -293,23 +615,113 @@ class Retrieval:
             ws.VectorAddElementwise(ws.yf, ws.yf, ws.y_baseline)
             ws.jacobianAdjustAndTransform()
 
-    def do_OEM(self, filename):
+    def set_line_of_sight(self, zenith, azimuth, time=None):
+        """Set the line of sight of the next OEM
+
+        Args:
+            zenith: Zenith angle
+            azimuth: Azimuth angle
+            time: Time used for the IGRF magnetic field, unchanged if None
+        """
+        self.require("atmosphere")
+        self.arts.sensor_los = [[zenith, azimuth]]
+        if time is not None:
+            self.time = str(time).replace("T", " ")
+            self.arts.time = pyarts.arts.Time(self.time)
+            self.arts.MagFieldsCalcIGRF()
+
+    def run_OEM(self, lm_ga_settings=None, max_iter=20, warm_start=False, start=None):
+        """Run the OEM on the current measurement
+
+        Runs the stages that have not been run yet, so a second call
+        with a new measurement or new settings only reruns the OEM.
+        With 'warm_start' the iteration starts from the state and the
+        final damping of the previous converged OEM, or of 'start' if
+        given, while xa is still the a priori. The diagnostics of every
+        OEM are kept in 'oem_log'
+
+        Args:
+            lm_ga_settings: Settings of the Levenberg-Marquardt method,
+                LM_GA_SETTINGS if not given
+            max_iter: Maximum number of iterations
+            warm_start: Boolean if the previous converged OEM should be
+                the first guess
+            start: Dictionary with the state 'x' and damping 'gamma' of
+                a converged OEM, e.g. 'converged', to start from instead
+
+        Returns:
+            Dictionary with the diagnostics of the OEM
+        """
+        self.require("sensor")
+        settings = list(LM_GA_SETTINGS if lm_ga_settings is None else lm_ga_settings)
+
+        previous = start if start is not None else self.converged if warm_start else None
+        if previous is not None:
+            # a damping of zero can not grow again, so start at the zero limit
+            settings[0] = max(previous["gamma"], settings[4])
+        self.init_retrieval(x=None if previous is None else previous["x"])
+
         print(f"Starting temperature retrieval of {self.line} line")
+        t0 = time.perf_counter()
         self.arts.OEM(
             method="lm",
-            lm_ga_settings=[200, 3, 1.5, 300, 5, 20],
-            max_iter=20,
+            lm_ga_settings=settings,
+            max_iter=max_iter,
             display_progress=1,
         )
+        dt = time.perf_counter() - t0
         self.arts.avkCalc()
         self.arts.covmat_ssCalc()
         self.arts.covmat_soCalc()
         self.arts.retrievalErrorsExtract()
         self.arts.x2artsSensor()
+
+        diagnostics = self.arts.oem_diagnostics.value
+        log = {
+            "warm_start": previous is not None,
+            "status": int(diagnostics[0]),
+            "start_cost": float(diagnostics[1]),
+            "end_cost": float(diagnostics[2]),
+            "gamma": float(diagnostics[3]),
+            "iterations": int(diagnostics[4]),
+            "time": dt,
+        }
+        self.oem_log.append(log)
+        if log["status"] == 0:
+            self.converged = {"x": np.array(self.arts.x.value), "gamma": log["gamma"]}
+
+        start = "previous state" if log["warm_start"] else "a priori"
+        print(
+            f"{self.line}: OEM from {start} ended with status {log['status']} after {log['iterations']} "
+            f"iterations in {dt:.1f} s ({dt / max(log['iterations'], 1):.1f} s per iteration)"
+        )
+        return log
+
+    def products(self, names=PRODUCTS):
+        """Function to get the products of the latest OEM
+
+        Args:
+            names: Names of the workspace variables
+
+        Returns:
+            Dictionary with the products as arrays
+        """
+        return {name: np.array(getattr(self.arts, name).value) for name in names}
+
+    def do_OEM(self, filename, lm_ga_settings=None, max_iter=20):
+        """Run the OEM and save the retrieval
+
+        Args:
+            filename: Save name of the retrieval
+            lm_ga_settings: Settings of the Levenberg-Marquardt method,
+                LM_GA_SETTINGS if not given
+            max_iter: Maximum number of iterations
+        """
+        self.run_OEM(lm_ga_settings=lm_ga_settings, max_iter=max_iter)
         self.retrieval_filename = filename
 
         self.save_ret(
-            self.arts.f_grid,
+            Variable("f_grid", self.f_backend),
             self.arts.xa,
             self.arts.x,
             self.arts.y,
@@ -326,7 +738,7 @@ class Retrieval:
         savepath = find_dir(dirname="simulation")
         with h5py.File(f"{savepath}/{self.retrieval_filename}", "w") as file:
             for data in argv:
-                file[data.name] = data.value
+                write_dataset(file, data.name, data.value, self.policy)
             file["plen"] = self.atm.plen
 
         print(f"Saved retrieval in {savepath}/{self.retrieval_filename}")
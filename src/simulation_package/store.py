@@ -0,0 +1,273 @@
+from datetime import datetime
+
+import h5py
+import numpy as np
+
+from simulation_package.files import find_dir
+from simulation_package.hdf import OutputPolicy
+from simulation_package.parallel import iter_jobs, report_job
+
+INDEX = {
+    "kind": h5py.string_dtype(),
+    "line": h5py.string_dtype(),
+    "zenith": "f8",
+    "azimuth": "f8",
+    "time": h5py.string_dtype(),
+    "zeeman": "?",
+    "disturb_index": "i8",
+    "disturb_delta": "f8",
+    "timestamp": h5py.string_dtype(),
+    "row": "i8",
+}
+
+
+def index_row(kind, line, zenith, azimuth, time, zeeman, disturbance=None, timestamp=None) -> dict:
+    """Function to make the index entry of a run
+
+    Args:
+        kind: Kind of result, e.g. 'ycalc' or 'retrieval'
+        line: Name of the line
+        zenith: Zenith angle
+        azimuth: Azimuth angle, mapped to [-180, 180)
+        time: Time used for the IGRF magnetic field
+        zeeman: Boolean if Zeeman splitting was used
+        disturbance: None or (index, delta) of the temperature disturbance
+        timestamp: Time of the run, now if not given
+
+    Returns:
+        Dictionary with the index columns
+    """
+    return {
+        "kind": str(kind),
+        "line": str(line),
+        "zenith": float(zenith),
+        "azimuth": (float(azimuth) + 180) % 360 - 180,
+        "time": str(time),
+        "zeeman": bool(zeeman),
+        "disturb_index": -1 if disturbance is None else int(disturbance[0]),
+        "disturb_delta": 0.0 if disturbance is None else float(disturbance[1]),
+        "timestamp": datetime.now().isoformat(timespec="seconds") if timestamp is None else str(timestamp),
+    }
+
+
+class ResultStore:
+    """Class for one appendable HDF5 file with all results
+
+    Results are kept in one group per kind and line, e.g.
+    'ycalc/kimra', with one resizable dataset per variable and one row
+    per run. Data that is the same for all runs of a group, such as
+    the frequency grid, is written once. The index group holds one
+    row per run with the run parameters and the row in its group, so
+    queries only read the index and the matching rows.
+
+    The datasets grow by doubling and the number of used rows is kept
+    in the attribute 'size' of the index and of every group, so
+    appending does not resize on every run. The unused rows are
+    trimmed by 'close'.
+
+    Only one process may write to the store, workers hand their
+    results to the writer through 'append_jobs'
+
+    Args:
+        filename: Name of the store in 'data/simulation'
+        mode: 'a' to append or create, 'r' to read
+        policy: OutputPolicy of the datasets, rows are chunked one by one
+            if the policy has no number of rows per chunk
+    """
+
+    def __init__(self, filename="results.hdf5", mode="a", policy: OutputPolicy = None):
+        self.path = find_dir(dirname="simulation") / filename
+        self.file = h5py.File(self.path, mode)
+        self.policy = OutputPolicy() if policy is None else policy
+
+        if mode != "r" and "index" not in self.file:
+            index = self.file.create_group("index")
+            for key, dtype in INDEX.items():
+                index.create_dataset(key, shape=(0,), maxshape=(None,), chunks=(1024,), dtype=dtype)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return _size(self.file["index"]) if "index" in self.file else 0
+
+    def _dataset(self, group, key, value):
+        if key in group:
+            return group[key]
+
+        rows = self.policy.chunks if isinstance(self.policy.chunks, int) and self.policy.chunks > 1 else 1
+        dtype = np.float32 if key in self.policy.float32 and value.dtype.kind == "f" else value.dtype
+        return group.create_dataset(
+            key,
+            shape=(0,) + value.shape,
+            maxshape=(None,) + value.shape,
+            chunks=(rows,) + value.shape if value.size else None,
+            dtype=dtype,
+            compression=self.policy.compression,
+            compression_opts=self.policy.level if self.policy.compression == "gzip" else None,
+            shuffle=self.policy.shuffle,
+        )
+
+    def append(self, params: dict, data: dict, shared: dict = None) -> int:
+        """Append one run
+
+        Args:
+            params: Run parameters from 'index_row'
+            data: Dictionary with the variables of the run
+            shared: Dictionary with variables that must be the same for
+                all runs of the group
+
+        Returns:
+            Row of the run in its group
+
+        Raises:
+            ValueError: Raised if the shared variables or the shapes do
+            not match earlier runs of the group
+        """
+        name = f"{params['kind']}/{params['line']}"
+        values = {key: np.asarray(value) for key, value in data.items()}
+        shared = shared or {}
+
+        # everything is checked before anything is created or written
+        group = self.file.get(name)
+        if group is not None:
+            for key, value in shared.items():
+                if key in group["shared"] and not np.array_equal(group["shared"][key][()], value):
+                    raise ValueError(f"'{key}' differs from earlier runs in {group.name}")
+            for key, value in values.items():
+                if key in group and group[key].shape[1:] != value.shape:
+                    raise ValueError(
+                        f"Shape {value.shape} of '{key}' does not match {group[key].shape[1:]} in {group.name}"
+                    )
+
+        group = self.file.require_group(name)
+        constants = group.require_group("shared")
+        for key, value in shared.items():
+            if key not in constants:
+                constants[key] = value
+
+        row = _size(group)
+        for key, value in values.items():
+            dataset = self._dataset(group, key, value)
+            _reserve(dataset, row + 1)
+            dataset[row] = value
+        group.attrs["size"] = row + 1
+
+        index = self.file["index"]
+        n = _size(index)
+        for key, value in dict(params, row=row).items():
+            _reserve(index[key], n + 1)
+            index[key][n] = value
+        index.attrs["size"] = n + 1
+        return row
+
+    def append_jobs(self, func, jobs: dict, workers: int = 1) -> list[str]:
+        """Run jobs and append their results as they finish
+
+        Every job returns a list of (params, data, shared) tuples,
+        which are written by this process only
+
+        Args:
+            func: Picklable function to call
+            jobs: Dictionary with job name as key and keyword arguments as value
+            workers: Number of worker processes
+
+        Returns:
+            Names of the failed jobs
+        """
+        failures = []
+        for name, ok, value in iter_jobs(func, jobs, workers=workers):
+            report_job(name, ok, value)
+            if not ok:
+                failures.append(name)
+                continue
+            for record in value:
+                self.append(*record)
+            self.file.flush()
+        return failures
+
+    def index(self) -> dict:
+        """Read the index
+
+        Returns:
+            Dictionary with one array per index column
+        """
+        n = len(self)
+        columns = {key: self.file["index"][key][:n] for key in INDEX}
+        for key, dtype in INDEX.items():
+            if dtype == h5py.string_dtype():
+                columns[key] = columns[key].astype(str)
+        return columns
+
+    def query(self, kind: str, line: str, keys=None, **filters) -> dict:
+        """Load the runs that match the filters
+
+        Floats are compared with np.isclose, other columns must be
+        equal, e.g. query("ycalc", "kimra", zenith=77.6)
+
+        Args:
+            kind: Kind of result
+            line: Name of the line
+            keys: Variables to load, all if not given
+            **filters: Values of index columns
+
+        Returns:
+            Dictionary with the index columns and variables of the
+            matching runs, and the shared variables of the group
+        """
+        index = self.index()
+        mask = (index["kind"] == kind) & (index["line"] == line)
+        for key, value in filters.items():
+            if key == "azimuth":
+                value = (float(value) + 180) % 360 - 180
+            if INDEX[key] == "f8":
+                mask &= np.isclose(index[key], value)
+            else:
+                mask &= index[key] == value
+
+        result = {key: column[mask] for key, column in index.items()}
+        group = self.file.get(f"{kind}/{line}")
+        if group is None:
+            return result
+
+        rows = result["row"]
+        order = np.argsort(rows)
+        variables = [key for key in group.keys() if key != "shared"] if keys is None else keys
+        for key in variables:
+            # h5py selects rows in increasing order only
+            data = group[key][rows[order]] if len(rows) else group[key][:0]
+            result[key] = data[np.argsort(order)]
+        for key, dataset in group["shared"].items():
+            result[key] = dataset[()]
+        return result
+
+    def trim(self):
+        """Remove the unused rows of the datasets"""
+
+        def visit(name, obj):
+            if isinstance(obj, h5py.Group) and "size" in obj.attrs:
+                for dataset in obj.values():
+                    if isinstance(dataset, h5py.Dataset) and dataset.shape[0] > obj.attrs["size"]:
+                        dataset.resize(obj.attrs["size"], axis=0)
+
+        self.file.visititems(visit)
+
+    def close(self):
+        if self.file.mode != "r":
+            self.trim()
+        self.file.close()
+
+
+def _size(group) -> int:
+    # stores written before the attribute was kept have no unused rows
+    if "size" in group.attrs:
+        return int(group.attrs["size"])
+    return len(group["row"]) if "row" in group else 0
+
+
+def _reserve(dataset, rows: int) -> None:
+    if dataset.shape[0] < rows:
+        dataset.resize(max(rows, 2 * dataset.shape[0]), axis=0)
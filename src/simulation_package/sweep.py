@@ -0,0 +1,195 @@
+import itertools
+import json
+
+import numpy as np
+
+from simulation_package.cache import ResultCache
+from simulation_package.parallel import JobError
+from simulation_package.store import ResultStore, index_row
+from simulation_package.ycalc import ForwardModel
+
+DEFAULT_TIME = "2024-01-04 19:00:00"
+STOKES = ("sI", "sQ", "sU", "sV")
+
+
+def normalise_point(zenith, azimuth, time, line, zeeman, disturbance) -> dict:
+    """Function to normalise one sweep point
+
+    Azimuths are mapped to [-180, 180) so that for example 270 and -90
+    are the same point, and a zero disturbance is the same as no
+    disturbance
+
+    Args:
+        zenith: Zenith angle
+        azimuth: Azimuth angle
+        time: Time used for the IGRF magnetic field
+        line: Name of the line
+        zeeman: Boolean if Zeeman splitting should be used
+        disturbance: None or (index, delta) of the temperature disturbance
+
+    Returns:
+        Dictionary with the point parameters
+    """
+    if disturbance is not None and float(disturbance[1]) == 0:
+        disturbance = None
+    if disturbance is not None:
+        disturbance = (int(disturbance[0]), float(disturbance[1]))
+
+    return {
+        "zenith": float(zenith),
+        "azimuth": (float(azimuth) + 180) % 360 - 180,
+        "time": str(time),
+        "line": str(line),
+        "zeeman": bool(zeeman),
+        "disturbance": disturbance,
+    }
+
+
+def sweep_points(
+    zenith,
+    azimuth,
+    time=(DEFAULT_TIME,),
+    line=("kimra",),
+    zeeman=(True,),
+    disturbance=(None,),
+) -> list[dict]:
+    """Function to make the points of a parameter sweep
+
+    Takes the Cartesian product of all axes and removes identical
+    points, keeping the order of first appearance
+
+    Args:
+        zenith: Zenith angles
+        azimuth: Azimuth angles
+        time: Times used for the IGRF magnetic field
+        line: Names of the lines
+        zeeman: Zeeman settings
+        disturbance: Temperature disturbances, None or (index, delta)
+
+    Returns:
+        List with one dictionary per unique point
+    """
+    points = {}
+    for values in itertools.product(zenith, azimuth, time, line, zeeman, disturbance):
+        point = normalise_point(*values)
+        key = tuple(point.values())
+        if key not in points:
+            points[key] = point
+    return list(points.values())
+
+
+def load_spec(filename: str) -> dict:
+    """Function to read a sweep specification
+
+    The specification is a JSON object with the keyword arguments
+    of 'sweep_points', e.g.
+
+        {"zenith": [77.6], "azimuth": [0, 90, 180, 270], "zeeman": [true, false]}
+
+    and optionally "lookup": true to use an absorption lookup table
+    in every session
+
+    Args:
+        filename: Name of the file
+
+    Returns:
+        Dictionary with the sweep axes
+    """
+    with open(filename, "r") as file:
+        spec = json.load(file)
+
+    if "disturbance" in spec:
+        spec["disturbance"] = [None if d is None else tuple(d) for d in spec["disturbance"]]
+    return spec
+
+
+def group_points(points: list[dict]) -> dict:
+    """Function to group points that can share a forward model session
+
+    Args:
+        points: Sweep points
+
+    Returns:
+        Dictionary with session parameters as key and list of points as value
+    """
+    groups = {}
+    for point in points:
+        key = (point["line"], point["zeeman"], point["time"], point["disturbance"])
+        groups.setdefault(key, []).append(point)
+    return groups
+
+
+def _sweep_job(points, batch_size, lookup=False):
+    point = points[0]
+    disturbance = point["disturbance"]
+    session = ForwardModel(
+        line=point["line"],
+        zeeman=point["zeeman"],
+        disturb_flag=disturbance is not None,
+        index=None if disturbance is None else disturbance[0],
+        delta=5 if disturbance is None else disturbance[1],
+        time=point["time"],
+        cache=ResultCache(),
+        jacobian=False,
+        lookup=lookup,
+    )
+
+    records = []
+    shared = {"f_grid": session.f_out, "jacobian_computed": False}
+    for i in range(0, len(points), batch_size):
+        batch = points[i : i + batch_size]
+        los = [[p["zenith"], p["azimuth"]] for p in batch]
+        for p, (stokes, _) in zip(batch, session.compute_batch(los)):
+            params = index_row("ycalc", p["line"], p["zenith"], p["azimuth"], p["time"], p["zeeman"], p["disturbance"])
+            records.append((params, {key: np.ravel(s) for key, s in zip(STOKES, stokes)}, shared))
+    print(session.cache.report())
+    return records
+
+
+def run_sweep(points: list[dict], filename: str, jobs: int = 1, batch_size: int = 16, lookup: bool = False):
+    """Function to run a parameter sweep
+
+    Points sharing line, Zeeman setting, time and disturbance are
+    computed in one forward model session with batched lines of sight.
+    The sessions are scheduled over 'jobs' worker processes, large
+    groups being split over several sessions, and the results are
+    appended to the ResultStore 'filename' as each session finishes
+
+    Args:
+        points: Sweep points from 'sweep_points'
+        filename: Name of the ResultStore
+        jobs: Number of worker processes
+        batch_size: Maximum number of lines of sight per yCalc
+        lookup: Boolean if an absorption lookup table should be used for
+            the species without Zeeman splitting
+
+    Returns:
+        Path to the saved data
+
+    Raises:
+        JobError: Raised if one or more sessions failed, after the
+        points of the other sessions have been saved
+    """
+    # large sessions are split so that all workers get something to do
+    tasks = {}
+    for (line, zeeman, time, disturbance), group in group_points(points).items():
+        chunk = max(batch_size, -(-len(group) // max(jobs, 1)))
+        for i in range(0, len(group), chunk):
+            name = f"{line}_{'zeeman' if zeeman else 'nozeeman'}_{time}_{disturbance}_{i // chunk}"
+            tasks[name] = {"points": group[i : i + chunk], "batch_size": batch_size, "lookup": lookup}
+
+    with ResultStore(filename) as store:
+        size = len(store)
+        failures = store.append_jobs(_sweep_job, tasks, workers=jobs)
+        size = len(store) - size
+
+    print(f"Saved {size} of {len(points)} sweep points in {store.path}")
+    if failures:
+        raise JobError(f"{len(failures)} of {len(tasks)} sessions failed: {', '.join(failures)}", failures)
+    return store.path
+
+
+def sweep(spec, filename="results.hdf5", jobs=1):
+    spec = load_spec(spec)
+    lookup = spec.pop("lookup", False)
+    run_sweep(sweep_points(**spec), filename=filename, jobs=jobs, lookup=lookup)
@@ -0,0 +1,117 @@
+import time
+
+import numpy as np
+
+from simulation_package.frequency import interpolate
+from simulation_package.hdf import LazyHDF5
+from simulation_package.measurements import MeasurementCatalogue
+from simulation_package.retrieval import LINES, Retrieval
+from simulation_package.store import ResultStore, index_row
+
+
+def _timeseries_job(line, entries, zeeman, update_field, lm_ga_settings, max_iter, warm_start):
+    retrieval = Retrieval(line=line, zeeman=zeeman)
+    retrieval.require("workspace")
+    shared = {"f_grid": retrieval.f_backend, "p_grid": retrieval.atm.pressure, "xa": retrieval.atm.apriori}
+
+    records = []
+    for entry in entries:
+        with LazyHDF5(entry["path"]) as file:
+            y = interpolate(file["f"], file["y"], retrieval.f_backend)
+
+        t0 = time.perf_counter()
+        retrieval.set_measurement(y)
+        retrieval.set_line_of_sight(entry["za"], entry["azimuth"], entry["time"] if update_field else None)
+        log = retrieval.run_OEM(lm_ga_settings=lm_ga_settings, max_iter=max_iter, warm_start=warm_start)
+        products = retrieval.products()
+        products["oem_time"] = log["time"]
+        products["spectrum_time"] = time.perf_counter() - t0
+        products["warm_start"] = log["warm_start"]
+
+        params = index_row("retrieval", line, entry["za"], entry["azimuth"], entry["time"], zeeman)
+        records.append((params, products, shared))
+
+    iterations = [log["iterations"] for log in retrieval.oem_log]
+    print(
+        f"{line}: {len(iterations)} spectra, {np.mean(iterations):.1f} iterations and "
+        f"{np.mean([log['time'] for log in retrieval.oem_log]):.1f} s per OEM"
+    )
+    return records
+
+
+def timeseries_retrieval(
+    line="kimra",
+    start=None,
+    end=None,
+    azimuth=None,
+    filename="results.hdf5",
+    jobs=1,
+    zeeman=True,
+    update_field=True,
+    lm_ga_settings=None,
+    max_iter=20,
+    warm_start=True,
+):
+    """Function to retrieve temperature from a series of measurements
+
+    The measurements are selected from the measurement catalogue and
+    split into one contiguous part per worker. Every worker sets up one
+    retrieval and then only swaps the measurement, the line of sight
+    and, if 'update_field', the magnetic field at the time of the
+    measurement before each OEM. The spectra are interpolated to the
+    channels of the retrieval and the products are appended to the
+    ResultStore 'filename' as kind 'retrieval', together with the
+    OEM diagnostics and timings. With 'warm_start' every OEM starts
+    from the previous converged spectrum of the same worker
+
+    Args:
+        line: Name of the line
+        start: First time of the series
+        end: Last time of the series, inclusive
+        azimuth: Azimuth angle of the measurements, all if None
+        filename: Name of the ResultStore
+        jobs: Number of worker processes
+        zeeman: Boolean if Zeeman splitting should be used
+        update_field: Boolean if the IGRF field should follow the measurement time
+        lm_ga_settings: Settings of the Levenberg-Marquardt method
+        max_iter: Maximum number of iterations
+        warm_start: Boolean if the OEM should start from the previous spectrum
+
+    Returns:
+        Number of retrieved spectra
+    """
+    # the measurement must cover the +-300 MHz of the retrieval channels
+    f0 = LINES[line]
+    entries = [
+        entry
+        for entry in MeasurementCatalogue().query(start=start, end=end, azimuth=azimuth)
+        if entry["fmin"] <= f0 - 300e6 and entry["fmax"] >= f0 + 300e6
+    ]
+    if not entries:
+        print(f"No measurements of the {line} line found")
+        return 0
+
+    tasks = {
+        f"{line}_{i}": {
+            "line": line,
+            "entries": list(part),
+            "zeeman": zeeman,
+            "update_field": update_field,
+            "lm_ga_settings": lm_ga_settings,
+            "max_iter": max_iter,
+            "warm_start": warm_start,
+        }
+        for i, part in enumerate(np.array_split(np.array(entries, dtype=object), min(jobs, len(entries))))
+    }
+
+    t0 = time.perf_counter()
+    with ResultStore(filename) as store:
+        size = len(store)
+        failures = store.append_jobs(_timeseries_job, tasks, workers=jobs)
+        size = len(store) - size
+    dt = time.perf_counter() - t0
+
+    print(f"Retrieved {size} of {len(entries)} spectra in {dt:.0f} s ({3600 * size / dt:.1f} spectra per hour)")
+    if failures:
+        print(f"Failed parts: {', '.join(failures)}")
+    return size
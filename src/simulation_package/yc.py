@@ -1,15 +1,25 @@
-from simulation_package.ycalc import ycalc_zeeman
-from tqdm import tqdm
+from simulation_package.ycalc import ycalc_azimuths
+from simulation_package.parallel import run_jobs
 
 
 # run ycalc
-def yc():
+def yc(jobs=1, lookup=False):
     azi = {"0": 0, "90": 90, "180": 180, "270": -90}
-    for name, az in tqdm(azi.items()):
-        ycalc_zeeman(
-            zenith=77.6,
-            azimuth=az,
-            line="kimra",
-            filename=f"YCALC_{name}.hdf5",
-            zeeman=True,
-        )
+    names = list(azi.keys())
+    njobs = max(1, min(jobs, len(names)))
+
+    # one forward model session per job, sharing the azimuths between them
+    run_jobs(
+        ycalc_azimuths,
+        {
+            f"ycalc_{i}": {
+                "zenith": 77.6,
+                "azimuths": {f"YCALC_{name}.hdf5": azi[name] for name in names[i::njobs]},
+                "line": "kimra",
+                "zeeman": True,
+                "lookup": lookup,
+            }
+            for i in range(njobs)
+        },
+        workers=njobs,
+    )
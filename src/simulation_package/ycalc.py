@@ -1,31 +1,40 @@
 import pyarts
 import os
+import time
 import numpy as np
 from simulation_package.make_grids import make_atm_grids
-from simulation_package.files import find_file, find_dir
+from simulation_package.files import find_dir
+from simulation_package.hdf import Variable, write_dataset
+from simulation_package.cache import ResultCache, file_hash, make_key
+from simulation_package.lookup import set_abs_lookup
+from simulation_package.catalogue import catalogue_version, load_lines, subset_path
+from simulation_package.frequency import LINES, adaptive_grid, interpolate, interpolation_error, uniform_grid
 import h5py
 
 
-def set_abs_file(line):
-    match line:
-        case "tempera":
-            abs_lines_per_species_file = find_file(filename="tempera.xml")
-        case "kimra":
-            abs_lines_per_species_file = find_file(filename="kimra.xml")
-    return abs_lines_per_species_file
-
-
-def save_ycalc(zenith, azimuth, sI, sQ, sU, sV, filename, *argv):
+def save_ycalc(zenith, azimuth, sI, sQ, sU, sV, filename, *argv, policy=None):
     savepath = find_dir(dirname="simulation")
     with h5py.File(f"{savepath}/{filename}", "w") as file:
         for data in argv:
-            file[data.name] = data.value
+            write_dataset(file, data.name, data.value, policy)
         file["azimuth"] = azimuth
         file["za"] = zenith
-        file["sI"] = sI
-        file["sQ"] = sQ
-        file["sU"] = sU
-        file["sV"] = sV
+        for name, value in (("sI", sI), ("sQ", sQ), ("sU", sU), ("sV", sV)):
+            write_dataset(file, name, value, policy)
+
+
+def arts_paths():
+    """Function to get the paths of the ARTS catalogue and XML data
+
+    Does not download the data, see 'set_arts_path'
+
+    Returns:
+        Tuple with the catalogue and the XML data directory
+    """
+    arts_catalogue_path = f"{os.getenv('HOME')}/.cache/arts/"
+    arts_catalogue_directory = f"{arts_catalogue_path}/arts-cat-data-2.6.10"
+    arts_xml_directory = f"{arts_catalogue_path}/arts-xml-data-2.6.10"
+    return arts_catalogue_directory, arts_xml_directory
 
 
 def set_arts_path():
@@ -35,159 +44,513 @@ def set_arts_path():
     if not os.path.exists(arts_catalogue_path):
         pyarts.cat.download.retrieve(verbose=True)
 
-    arts_catalogue_directory = f"{arts_catalogue_path}/arts-cat-data-2.6.10"
-    arts_xml_directory = f"{arts_catalogue_path}/arts-xml-data-2.6.10"
-    return arts_catalogue_directory, arts_xml_directory
+    return arts_paths()
 
 
-def set_jacobian(ws, pressure, latitude, longitude):
+def set_jacobian(ws, pressure, latitude, longitude, hse=True):
     ws.jacobianInit()
-    ws.jacobianAddTemperature(g1=pressure, g2=[latitude], g3=[longitude])
+    ws.jacobianAddTemperature(g1=pressure, g2=[latitude], g3=[longitude], hse="on" if hse else "off")
     ws.jacobianClose()
     return ws
 
 
-def set_line(ws, line, flen, zeeman):
-    f0 = 233.9461e9
-    f = np.linspace(f0 - 15e6, f0 + 15e6, flen)
+def line_setup(flen, zeeman, grid="uniform", line="kimra"):
+    f0 = LINES[line]
+    f = uniform_grid(f0, 15e6, flen)
+    if grid == "adaptive":
+        f = adaptive_grid(f0, 15e6, df_min=f[1] - f[0], df_max=100e3, channels=f)
 
     start = f[0]
     stop = f[-1]
-    ws.f_grid = f
     if zeeman:
-        ws.abs_speciesSet(
-            species=[
-                f"O2-Z-*-{start - 1}-{stop + 1}",
-                f"O3-*-{start - 1}-{stop + 1}",
-                "N2-SelfContStandardType",
-                "H2O-PWR98",
-            ]
-        )
+        species = [
+            f"O2-Z-*-{start - 1}-{stop + 1}",
+            f"O3-*-{start - 1}-{stop + 1}",
+            "N2-SelfContStandardType",
+            "H2O-PWR98",
+        ]
     else:
-        ws.abs_speciesSet(
-            species=[
-                f"O2-*-{start - 1}-{stop + 1}",
-                f"O3-*-{start - 1}-{stop + 1}",
-                "N2-SelfContStandardType",
-                "H2O-PWR98",
-            ]
-        )
+        species = [
+            f"O2-*-{start - 1}-{stop + 1}",
+            f"O3-*-{start - 1}-{stop + 1}",
+            "N2-SelfContStandardType",
+            "H2O-PWR98",
+        ]
+    return f, species
+
+
+def set_line(ws, line, flen, zeeman):
+    f, species = line_setup(flen=flen, zeeman=zeeman, line=line)
+    ws.f_grid = f
+    ws.abs_speciesSet(species=species)
     return ws
 
 
-def set_atm_grids(start, disturb_flag=False, index=None):
-    grids = make_atm_grids(start=0, disturb_flag=disturb_flag, index=index)
+def set_atm_grids(start, disturb_flag=False, index=None, delta=5, timestamp=None):
+    grids = make_atm_grids(start=0, disturb_flag=disturb_flag, index=index, delta=delta, timestamp=timestamp)
     return grids
 
 
-def ycalc_zeeman(
-    zenith, azimuth, zeeman, line, filename, disturb_flag=False, index=None
-):
-    ARTS_CAT, ARTS_XML = set_arts_path()
-    ATMBASE = f"{ARTS_XML}/planets/Earth/Fascod/subarctic-winter/subarctic-winter"
+class ForwardModel:
+    """Forward model session
+
+    Configures one ARTS workspace for a line, Zeeman setting and
+    atmosphere. Everything that does not depend on the line of sight
+    is done once, so 'compute' only has to set the geometry and run
+    yCalc. The workspace is only set up when a result is not found
+    in 'cache', so cache hits never touch ARTS
+
+    Args:
+        line: Name of the line, 'kimra' or 'tempera'
+        zeeman: Boolean if Zeeman splitting should be used
+        disturb_flag: Boolean if disturbance should be used
+        index: Index of where disturbance should be done
+        delta: Size of the disturbance in K
+        time: Time used for the IGRF magnetic field
+        cache: ResultCache for computed spectra or None
+        grid: 'uniform' for the FLEN point grid or 'adaptive' for a grid
+            that is dense at the line center and coarser in the wings,
+            results are always interpolated back to the FLEN channels
+        jacobian: Boolean if the temperature Jacobian should be computed
+        hse: Boolean if the temperature Jacobian should include the change
+            of the altitudes by hydrostatic equilibrium
+        lookup: Boolean if an absorption lookup table should be used for
+            the species without Zeeman splitting
+        profile_time: Time of the atmospheric profiles in the profile
+            store, the fixed XML grids are used if None
+    """
+
     LAT = 67.8
     LON = 20.22
     FLEN = 5000
+    SENSOR_HEIGHT = 30
 
-    ws = pyarts.workspace.Workspace()
-    ws = set_line(ws=ws, line=line, flen=FLEN, zeeman=zeeman)
-    abs_lines_per_species_file = set_abs_file(line=line)
-    grids = set_atm_grids(start=0, disturb_flag=disturb_flag, index=index)
-
-    ws.ppath_agendaSet(option="FollowSensorLosPath")
-    ws.iy_main_agendaSet(option="Emission")
-    ws.surface_rtprop_agendaSet(option="Blackbody_SurfTFromt_surface")
-    ws.ppath_step_agendaSet(option="GeometricPath")
-    ws.iy_space_agendaSet()
-    ws.iy_surface_agendaSet()
-    ws.water_p_eq_agendaSet()
-    ws.iy_unit = "PlanckBT"
-    ws.ppath_lmax = 10e3
-    ws.ppath_lraytrace = 1e3
-    ws.rt_integration_option = "default"
-    ws.rte_alonglos_v = 0.0
-    ws.nlteOff()
-
-    ws.Wigner6Init()
-    ws.ReadXML(ws.abs_lines_per_species, str(abs_lines_per_species_file))
-    ws.propmat_clearsky_agendaAuto()
-
-    ws.p_grid = grids.pressure
-    ws.lat_grid = np.linspace(50, 80)
-    ws.lon_grid = np.linspace(-180, 180)
-    ws.refellipsoidEarth(model="Sphere")
-
-    ws.AtmRawRead(basename=ATMBASE)
-    data = pyarts.arts.GriddedField3(
-        [grids.pressure, [0], [0]],
-        np.array(grids.temperature).reshape(grids.plen, 1, 1),
-        gridnames=["Pressure", "Latitude", "Longitude"],
-    )
+    def __init__(
+        self,
+        line,
+        zeeman,
+        disturb_flag=False,
+        index=None,
+        delta=5,
+        time="2024-01-04 19:00:00",
+        cache=None,
+        grid="uniform",
+        jacobian=True,
+        hse=True,
+        lookup=False,
+        profile_time=None,
+    ):
+        self.line = line
+        self.zeeman = zeeman
+        self.time = time
+        self.stokes_dim = 4 if zeeman else 1
+        self.cache = cache
 
-    ws.t_field_raw = data
+        self.grid = grid
+        self.do_jacobian = jacobian
+        self.hse = hse
+        self.lookup = lookup
+        self.f_out, _ = line_setup(flen=self.FLEN, zeeman=zeeman, line=line)
+        self.f_grid, self.species = line_setup(flen=self.FLEN, zeeman=zeeman, grid=grid, line=line)
+        # only the version is needed for the key, the catalogue is downloaded in '_setup'
+        ARTS_CAT, _ = arts_paths()
+        self.abs_lines_per_species_file = subset_path(self.species, catalogue_version(ARTS_CAT))
+        self.line_hash = file_hash(self.abs_lines_per_species_file)
+        self.grids = set_atm_grids(
+            start=0, disturb_flag=disturb_flag, index=index, delta=delta, timestamp=profile_time
+        )
 
-    ws.AtmosphereSet3D()
-    ws.AtmFieldsCalcExpand1D()
-    z0 = min(ws.z_field.value[:, :, :].flatten())
-    ws.z_surfaceConstantAltitude(altitude=z0)
-    ws.t_surface = grids.temperature[0] + np.ones_like(ws.z_surface.value)
-    ws.Touch(ws.wind_u_field)
-    ws.Touch(ws.wind_v_field)
-    ws.Touch(ws.wind_w_field)
-    ws.MagFieldsCalcIGRF(time=pyarts.arts.Time("2024-01-04 19:00:00"))
-    ws = set_jacobian(ws=ws, pressure=grids.pressure, latitude=LAT, longitude=LON)
-    ws.cloudboxOff()
+        self.z_field = None
+        self.jacobian = None
+        self._ws = None
 
-    if zeeman:
-        ws.stokes_dim = 4
-    else:
-        ws.stokes_dim = 1
+    @property
+    def ws(self):
+        return self.setup()
 
-    ws.sensor_pos = [[z0 + 30, LAT, LON]]
-    ws.sensor_los = [[zenith, azimuth]]
-    ws.sensorOff()
+    def setup(self):
+        """Set up the workspace if it is not set up yet
+
+        Returns:
+            ARTS workspace
+        """
+        if self._ws is None:
+            self._setup()
+        return self._ws
+
+    def _setup(self):
+        ARTS_CAT, ARTS_XML = set_arts_path()
+        ATMBASE = f"{ARTS_XML}/planets/Earth/Fascod/subarctic-winter/subarctic-winter"
+        grids = self.grids
+
+        ws = pyarts.workspace.Workspace()
+        ws.f_grid = self.f_grid
+        ws.abs_speciesSet(species=self.species)
+
+        ws.ppath_agendaSet(option="FollowSensorLosPath")
+        ws.iy_main_agendaSet(option="Emission")
+        ws.surface_rtprop_agendaSet(option="Blackbody_SurfTFromt_surface")
+        ws.ppath_step_agendaSet(option="GeometricPath")
+        ws.iy_space_agendaSet()
+        ws.iy_surface_agendaSet()
+        ws.water_p_eq_agendaSet()
+        ws.iy_unit = "PlanckBT"
+        ws.ppath_lmax = 10e3
+        ws.ppath_lraytrace = 1e3
+        ws.rt_integration_option = "default"
+        ws.rte_alonglos_v = 0.0
+        ws.nlteOff()
+
+        ws.Wigner6Init()
+        self.abs_lines_per_species_file = load_lines(
+            ws=ws,
+            species=self.species,
+            catalogue_directory=ARTS_CAT,
+        )
+        self.line_hash = file_hash(self.abs_lines_per_species_file)
+        ws.propmat_clearsky_agendaAuto()
 
-    ws.atmgeom_checkedCalc()
-    try:
+        ws.p_grid = grids.pressure
+        ws.lat_grid = np.linspace(50, 80)
+        ws.lon_grid = np.linspace(-180, 180)
+        ws.refellipsoidEarth(model="Sphere")
+
+        ws.AtmRawRead(basename=ATMBASE)
+        ws.t_field_raw = self._t_field_raw()
+
+        ws.AtmosphereSet3D()
+        ws.AtmFieldsCalcExpand1D()
+        self.z0 = min(ws.z_field.value[:, :, :].flatten())
+        ws.z_surfaceConstantAltitude(altitude=self.z0)
+        ws.t_surface = grids.temperature[0] + np.ones_like(ws.z_surface.value)
+        ws.Touch(ws.wind_u_field)
+        ws.Touch(ws.wind_v_field)
+        ws.Touch(ws.wind_w_field)
+        ws.MagFieldsCalcIGRF(time=pyarts.arts.Time(self.time))
+        if self.do_jacobian:
+            ws = set_jacobian(ws=ws, pressure=grids.pressure, latitude=self.LAT, longitude=self.LON, hse=self.hse)
+        else:
+            ws.jacobianOff()
+        ws.cloudboxOff()
+        ws.stokes_dim = self.stokes_dim
+
+        ws.sensor_pos = [[self.z0 + self.SENSOR_HEIGHT, self.LAT, self.LON]]
+        ws.sensorOff()
+
+        ws.atmgeom_checkedCalc()
         ws.lbl_checkedCalc()
-    except RuntimeError:
-        ws.abs_lines_per_speciesReadSpeciesSplitCatalog(basename=f"{ARTS_CAT}/lines/")
-        ws.WriteXML(
-            output_file_format="binary",
-            input=ws.abs_lines_per_species,
-            filename=str(abs_lines_per_species_file),
+        ws.atmfields_checkedCalc()
+        ws.cloudbox_checkedCalc()
+        ws.propmat_clearsky_agenda_checkedCalc()
+        if self.lookup:
+            ws = set_abs_lookup(ws=ws, species=self.species)
+
+        self._ws = ws
+
+    def _t_field_raw(self):
+        return pyarts.arts.GriddedField3(
+            [self.grids.pressure, [0], [0]],
+            np.array(self.grids.temperature).reshape(self.grids.plen, 1, 1),
+            gridnames=["Pressure", "Latitude", "Longitude"],
         )
-    ws.lbl_checkedCalc()
-    ws.atmfields_checkedCalc()
-    ws.cloudbox_checkedCalc()
-    ws.sensor_checkedCalc()
-    ws.propmat_clearsky_agenda_checkedCalc()
 
-    ws.yCalc()
-    if zeeman:
-        y = ws.y.value[::1].reshape(FLEN, 4)
+    def set_temperature(self, temperature):
+        """Replace the temperature profile of the session
 
-        # Stokes components
-        sI = np.reshape(y[:, 0], (FLEN, 1))
-        sQ = np.reshape(y[:, 1], (FLEN, 1))
-        sU = np.reshape(y[:, 2], (FLEN, 1))
-        sV = np.reshape(y[:, 3], (FLEN, 1))
-    else:
-        sI = ws.y.value
-        sQ = np.zeros(shape=FLEN)
-        sU = np.zeros(shape=FLEN)
-        sV = np.zeros(shape=FLEN)
-
-    save_ycalc(
-        zenith,
-        azimuth,
-        sI,
-        sQ,
-        sU,
-        sV,
-        filename,
-        ws.f_grid,
-        ws.jacobian,
-        ws.p_grid,
-        ws.z_field,
+        The profile is on the pressure grid of the workspace, so t_field
+        is set directly and the rest of the workspace is kept
+
+        Args:
+            temperature: Temperature profile on the pressure grid
+        """
+        self.grids.temperature = np.array(temperature, dtype=float)
+
+        if self._ws is not None:
+            ws = self._ws
+            ws.t_field = np.broadcast_to(self.grids.temperature[:, None, None], ws.t_field.value.shape)
+            ws.t_surface = self.grids.temperature[0] + np.ones_like(ws.z_surface.value)
+            ws.atmfields_checkedCalc()
+
+    def key(self, zenith, azimuth):
+        """Cache key of one line of sight
+
+        Args:
+            zenith: Zenith angle
+            azimuth: Azimuth angle
+
+        Returns:
+            Key from 'make_key' over every input that affects the result
+        """
+        return make_key(
+            kind="ycalc_zeeman",
+            f_grid=self.f_grid,
+            f_out=self.f_out,
+            species=self.species,
+            pressure=self.grids.pressure,
+            temperature=self.grids.temperature,
+            position=(self.LAT, self.LON, self.SENSOR_HEIGHT),
+            los=(float(zenith), float(azimuth)),
+            time=self.time,
+            stokes_dim=self.stokes_dim,
+            lines=self.line_hash,
+            lookup=self.lookup,
+            hse=self.hse,
+        )
+
+    def compute(self, zenith, azimuth):
+        """Compute the spectrum for one line of sight
+
+        Args:
+            zenith: Zenith angle
+            azimuth: Azimuth angle
+
+        Returns:
+            Tuple with the Stokes components I, Q, U and V
+        """
+        stokes, self.jacobian = self.compute_batch([[zenith, azimuth]])[0]
+        return stokes
+
+    def compute_batch(self, los):
+        """Compute the spectra for several lines of sight in one yCalc
+
+        Lines of sight found in the cache are not computed again
+
+        Args:
+            los: Array with (zenith, azimuth) pairs
+
+        Returns:
+            List with one (stokes, jacobian) tuple per line of sight, where
+            stokes is a tuple with the Stokes components I, Q, U and V
+        """
+        los = np.atleast_2d(np.asarray(los, dtype=float))
+        results = [None] * los.shape[0]
+        missing = []
+
+        for i, (zenith, azimuth) in enumerate(los):
+            entry = None if self.cache is None else self.cache.get(self.key(zenith, azimuth))
+            if entry is None or self.do_jacobian and "jacobian" not in entry:
+                missing.append(i)
+            else:
+                results[i] = (entry["y"], entry.get("jacobian") if self.do_jacobian else None)
+                self.z_field = entry["z_field"]
+
+        if missing:
+            for i, (y, block) in zip(missing, self._ycalc(los[missing])):
+                results[i] = (y, block)
+                if self.cache is not None:
+                    arrays = {"y": y, "z_field": self.z_field}
+                    if block is not None:
+                        arrays["jacobian"] = block
+                    self.cache.put(self.key(*los[i]), **arrays)
+
+        return [(self._split_stokes(y), block) for y, block in results]
+
+    def _ycalc(self, los):
+        ws = self.ws
+        nlos = los.shape[0]
+
+        ws.sensor_pos = np.tile([self.z0 + self.SENSOR_HEIGHT, self.LAT, self.LON], (nlos, 1))
+        ws.sensor_los = los
+        ws.sensor_checkedCalc()
+        ws.yCalc()
+        self.z_field = ws.z_field.value.copy()
+
+        # y and the jacobian rows are ordered line of sight, frequency, stokes
+        flen = len(self.f_grid)
+        y = ws.y.value.reshape(nlos, flen, self.stokes_dim)
+        if self.do_jacobian:
+            jacobian = ws.jacobian.value.reshape(nlos, flen, self.stokes_dim, -1)
+
+        results = []
+        for i in range(nlos):
+            yi = y[i]
+            ji = jacobian[i] if self.do_jacobian else None
+            if self.grid != "uniform":
+                yi = interpolate(self.f_grid, yi, self.f_out)
+                ji = None if ji is None else interpolate(self.f_grid, ji, self.f_out)
+            if ji is not None:
+                ji = ji.reshape(self.FLEN * self.stokes_dim, -1).copy()
+            results.append((yi.copy(), ji))
+        return results
+
+    def flatten(self, stokes):
+        """Stack Stokes components into the ARTS y ordering
+
+        Args:
+            stokes: Tuple with the Stokes components from 'compute'
+
+        Returns:
+            Vector ordered frequency, stokes like the rows of the Jacobian
+        """
+        return np.column_stack([np.ravel(s) for s in stokes[: self.stokes_dim]]).ravel()
+
+    def _split_stokes(self, y):
+        if self.zeeman:
+            sI = np.reshape(y[:, 0], (self.FLEN, 1))
+            sQ = np.reshape(y[:, 1], (self.FLEN, 1))
+            sU = np.reshape(y[:, 2], (self.FLEN, 1))
+            sV = np.reshape(y[:, 3], (self.FLEN, 1))
+        else:
+            sI = y[:, 0]
+            sQ = np.zeros(shape=self.FLEN)
+            sU = np.zeros(shape=self.FLEN)
+            sV = np.zeros(shape=self.FLEN)
+        return sI, sQ, sU, sV
+
+    def save(self, zenith, azimuth, stokes, filename, jacobian=None, policy=None):
+        """Save a computation with 'save_ycalc'
+
+        Args:
+            zenith: Zenith angle
+            azimuth: Azimuth angle
+            stokes: Tuple with the Stokes components from 'compute'
+            filename: Save name of the data
+            jacobian: Jacobian block of the line of sight, the one from
+                the latest 'compute' is used if not given
+            policy: OutputPolicy of the datasets
+        """
+        if jacobian is None:
+            jacobian = self.jacobian
+
+        data = [
+            Variable("f_grid", self.f_out),
+            Variable("p_grid", self.grids.pressure),
+            Variable("z_field", self.z_field),
+            Variable("jacobian_computed", self.do_jacobian),
+        ]
+        if self.do_jacobian:
+            data.append(Variable("jacobian", jacobian))
+
+        save_ycalc(zenith, azimuth, *stokes, filename, *data, policy=policy)
+
+
+def ycalc_zeeman(
+    zenith,
+    azimuth,
+    zeeman,
+    line,
+    filename,
+    disturb_flag=False,
+    index=None,
+    use_cache=True,
+    jacobian=True,
+    lookup=False,
+):
+    cache = ResultCache() if use_cache else None
+    session = ForwardModel(
+        line=line,
+        zeeman=zeeman,
+        disturb_flag=disturb_flag,
+        index=index,
+        cache=cache,
+        jacobian=jacobian,
+        lookup=lookup,
+    )
+    stokes = session.compute(zenith=zenith, azimuth=azimuth)
+    session.save(zenith, azimuth, stokes, filename)
+    if cache is not None:
+        print(cache.report())
+
+
+def ycalc_batch(
+    los, filenames, zeeman, line, disturb_flag=False, index=None, use_cache=True, jacobian=True, lookup=False
+):
+    """Function to run ycalc for several lines of sight in one yCalc
+
+    Args:
+        los: Array with (zenith, azimuth) pairs
+        filenames: Save names, one per line of sight
+        zeeman: Boolean if Zeeman splitting should be used
+        line: Name of the line
+        disturb_flag: Boolean if disturbance should be used
+        index: Index of where disturbance should be done
+        use_cache: Boolean if the result cache should be used
+        jacobian: Boolean if the temperature Jacobian should be computed
+        lookup: Boolean if an absorption lookup table should be used for
+            the species without Zeeman splitting
+    """
+    los = np.atleast_2d(np.asarray(los, dtype=float))
+    if len(filenames) != los.shape[0]:
+        raise ValueError("Need one filename per line of sight")
+
+    cache = ResultCache() if use_cache else None
+    session = ForwardModel(
+        line=line,
+        zeeman=zeeman,
+        disturb_flag=disturb_flag,
+        index=index,
+        cache=cache,
+        jacobian=jacobian,
+        lookup=lookup,
     )
+    results = session.compute_batch(los)
+    for (zenith, azimuth), (stokes, block), filename in zip(los, results, filenames):
+        session.save(zenith, azimuth, stokes, filename, jacobian=block)
+    if cache is not None:
+        print(cache.report())
+
+
+def ycalc_azimuths(
+    zenith, azimuths, zeeman, line, disturb_flag=False, index=None, use_cache=True, jacobian=True, lookup=False
+):
+    """Function to run ycalc for several azimuths in one batched yCalc
+
+    Args:
+        zenith: Zenith angle
+        azimuths: Dictionary with save name as key and azimuth as value
+        zeeman: Boolean if Zeeman splitting should be used
+        line: Name of the line
+        disturb_flag: Boolean if disturbance should be used
+        index: Index of where disturbance should be done
+        use_cache: Boolean if the result cache should be used
+        jacobian: Boolean if the temperature Jacobian should be computed
+        lookup: Boolean if an absorption lookup table should be used for
+            the species without Zeeman splitting
+    """
+    ycalc_batch(
+        los=[[zenith, azimuth] for azimuth in azimuths.values()],
+        filenames=list(azimuths.keys()),
+        zeeman=zeeman,
+        line=line,
+        disturb_flag=disturb_flag,
+        index=index,
+        use_cache=use_cache,
+        jacobian=jacobian,
+        lookup=lookup,
+    )
+
+
+def grid_report(zenith=77.6, azimuth=0, zeeman=True, line="kimra"):
+    """Function to compare the adaptive and the uniform frequency grid
+
+    Runs one line of sight on both grids and reports the number of
+    frequencies, the yCalc time and the interpolation error of the
+    adaptive grid against the uniform FLEN point grid
+
+    Args:
+        zenith: Zenith angle
+        azimuth: Azimuth angle
+        zeeman: Boolean if Zeeman splitting should be used
+        line: Name of the line
+
+    Returns:
+        Dictionary with the report for each Stokes component
+    """
+    spectra = {}
+    for grid in ("uniform", "adaptive"):
+        session = ForwardModel(line=line, zeeman=zeeman, grid=grid, jacobian=False)
+        session.setup()  # outside of the timing
+        t0 = time.perf_counter()
+        spectra[grid] = np.column_stack([np.ravel(s) for s in session.compute(zenith, azimuth)])
+        dt = time.perf_counter() - t0
+        print(f"{grid:>8}: {len(session.f_grid)} frequencies, yCalc {dt:.2f} s")
+
+    error = interpolation_error(spectra["uniform"], spectra["adaptive"])
+    report = {
+        name: {"max_abs": error["max_abs_per_column"][i]}
+        for i, name in enumerate(("I", "Q", "U", "V"))
+    }
+    for name, value in report.items():
+        print(f"{name}: max abs error {value['max_abs']:.2e} K")
+    print(f"all: max abs error {error['max_abs']:.2e} K, rms {error['rms']:.2e} K")
+    return report
@@ -0,0 +1,15 @@
+import pytest
+
+from simulation_package import files
+
+
+@pytest.fixture
+def root(tmp_path, monkeypatch):
+    """Data root in a temporary directory"""
+    (tmp_path / "data").mkdir()
+    monkeypatch.setenv(files.ROOT_VARIABLE, str(tmp_path))
+    files.data_root.cache_clear()
+    files.file_index.cache_clear()
+    yield tmp_path
+    files.data_root.cache_clear()
+    files.file_index.cache_clear()
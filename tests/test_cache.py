@@ -0,0 +1,51 @@
+import os
+
+import numpy as np
+
+from simulation_package.cache import ResultCache, make_key
+
+
+def test_make_key_depends_on_content_dtype_and_shape():
+    a = np.arange(6.0)
+    assert make_key(a=a, b="x") == make_key(b="x", a=a.copy())
+    assert make_key(a=a) != make_key(a=a + 1)
+    assert make_key(a=a) != make_key(a=a.astype(np.float32))
+    assert make_key(a=a) != make_key(a=a.reshape(2, 3))
+    assert make_key(a=a) != make_key(b=a)
+    assert make_key(a=1) != make_key(a="1")
+
+
+def test_put_and_get(tmp_path):
+    cache = ResultCache(directory=tmp_path)
+    key = make_key(x=1)
+    assert cache.get(key) is None
+
+    cache.put(key, y=np.arange(3.0))
+    np.testing.assert_array_equal(cache.get(key)["y"], np.arange(3.0))
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_total_follows_replaced_entries(tmp_path):
+    cache = ResultCache(directory=tmp_path)
+    cache.put("a", y=np.zeros(100))
+    cache.put("a", y=np.zeros(10))
+    cache.put("b", y=np.zeros(10))
+    assert cache.total == cache.size()
+
+
+def test_evict_least_recently_used(tmp_path):
+    entry = np.zeros(1000)
+    cache = ResultCache(directory=tmp_path)
+    cache.put("a", y=entry)
+    size = cache.size()
+    cache.max_bytes = 2 * size
+
+    cache.put("b", y=entry)
+    os.utime(cache.path("a"), (0, 0))
+    os.utime(cache.path("b"), (1, 1))
+    assert cache.get("a") is not None  # a hit makes 'a' the newest entry
+
+    cache.put("c", y=entry)
+    assert sorted(path.stem for path in tmp_path.glob("*.npz")) == ["a", "c"]
+    assert cache.total == 2 * size
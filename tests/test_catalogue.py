@@ -0,0 +1,83 @@
+import json
+
+from simulation_package.catalogue import catalogue_version, is_valid, load_lines, subset_path
+
+SPECIES = ["O2-Z-*-233e9-234e9", "O3-*-233e9-234e9"]
+CATALOGUE = "/cache/arts/arts-cat-data-2.6.10"
+
+
+class Workspace:
+    """Workspace stub that records the methods called on it"""
+
+    abs_lines_per_species = "abs_lines_per_species"
+
+    def __init__(self):
+        self.calls = []
+
+    def ReadXML(self, variable, filename):
+        self.calls.append("ReadXML")
+
+    def abs_lines_per_speciesReadSpeciesSplitCatalog(self, basename):
+        self.calls.append("ReadSpeciesSplitCatalog")
+
+    def WriteXML(self, output_file_format, input, filename):
+        self.calls.append("WriteXML")
+        with open(filename, "w") as file:
+            file.write("<arts/>")
+        with open(f"{filename}.bin", "wb") as file:
+            file.write(b"lines")
+
+
+def test_catalogue_version():
+    assert catalogue_version(CATALOGUE) == "2.6.10"
+
+
+def test_load_lines_writes_and_reads_the_subset(root):
+    ws = Workspace()
+    path = load_lines(ws, SPECIES, CATALOGUE)
+    assert ws.calls == ["ReadSpeciesSplitCatalog", "WriteXML"]
+    assert path == subset_path(SPECIES, "2.6.10")
+    assert is_valid(path, SPECIES, "2.6.10")
+    assert sorted(p.name for p in path.parent.iterdir()) == sorted(
+        [path.name, f"{path.name}.bin", path.with_suffix(".json").name]
+    )
+
+    ws = Workspace()
+    assert load_lines(ws, SPECIES, CATALOGUE) == path
+    assert ws.calls == ["ReadXML"]
+
+    ws = Workspace()
+    load_lines(ws, SPECIES, CATALOGUE, refresh=True)
+    assert ws.calls == ["ReadSpeciesSplitCatalog", "WriteXML"]
+
+
+def test_manifest_invalidation(root):
+    path = load_lines(Workspace(), SPECIES, CATALOGUE)
+    manifest = path.with_suffix(".json")
+    assert not is_valid(path, SPECIES[:1], "2.6.10")
+    assert not is_valid(path, SPECIES, "2.6.11")
+
+    with open(manifest) as file:
+        content = json.load(file)
+    with open(manifest, "w") as file:
+        json.dump(dict(content, source="window"), file)
+    assert not is_valid(path, SPECIES, "2.6.10")
+
+    with open(manifest, "w") as file:
+        json.dump(content, file)
+    assert is_valid(path, SPECIES, "2.6.10")
+    with open(f"{path}.bin", "ab") as file:
+        file.write(b"more")
+    assert not is_valid(path, SPECIES, "2.6.10")
+
+    manifest.write_text("{")
+    assert not is_valid(path, SPECIES, "2.6.10")
+    manifest.unlink()
+    assert not is_valid(path, SPECIES, "2.6.10")
+
+
+def test_subset_path_depends_on_species_and_version(root):
+    path = subset_path(SPECIES, "2.6.10")
+    assert path == subset_path(list(SPECIES), "2.6.10")
+    assert path != subset_path(SPECIES[::-1], "2.6.10")
+    assert path != subset_path(SPECIES, "2.6.11")
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from simulation_package.covariance import banded, dense, diagonal, exponential, exponential_inverse
+
+Z = np.linspace(0, 60e3, 40)
+
+
+def test_diagonal():
+    np.testing.assert_array_equal(dense(diagonal(2.0, n=3)), 2 * np.eye(3))
+    np.testing.assert_array_equal(dense(diagonal([1.0, 4.0])), np.diag([1.0, 4.0]))
+
+
+def test_scalar_variance_needs_size():
+    with pytest.raises(ValueError):
+        diagonal(2.0)
+    with pytest.raises(ValueError):
+        banded(2.0, [0.5])
+
+
+def test_banded():
+    matrix = dense(banded([1.0, 4.0, 9.0, 16.0], [0.5, 0.25]))
+    sigma = np.array([1.0, 2.0, 3.0, 4.0])
+    k = np.abs(np.subtract.outer(np.arange(4), np.arange(4)))
+    expected = np.outer(sigma, sigma) * np.select([k == 0, k == 1, k == 2], [1.0, 0.5, 0.25])
+    np.testing.assert_allclose(matrix, expected)
+
+
+def test_exponential_is_full_without_cutoff():
+    variance = np.linspace(1, 4, len(Z))
+    sigma = np.sqrt(variance)
+    expected = np.outer(sigma, sigma) * np.exp(-np.abs(np.subtract.outer(Z, Z)) / 5e3)
+    np.testing.assert_allclose(dense(exponential(Z, variance, 5e3)), expected)
+
+
+def test_exponential_cutoff():
+    matrix = dense(exponential(Z, 1.0, 5e3, cutoff=0.01))
+    correlation = np.exp(-np.abs(np.subtract.outer(Z, Z)) / 5e3)
+    np.testing.assert_allclose(matrix, np.where(correlation > 0.01, correlation, 0))
+
+
+def test_exponential_inverse():
+    variance = np.linspace(1, 4, len(Z))
+    product = dense(exponential(Z, variance, 5e3)) @ dense(exponential_inverse(Z, variance, 5e3))
+    np.testing.assert_allclose(product, np.eye(len(Z)), atol=1e-10)
+    product = dense(exponential(Z[::-1], 2.0, 5e3)) @ dense(exponential_inverse(Z[::-1], 2.0, 5e3))
+    np.testing.assert_allclose(product, np.eye(len(Z)), atol=1e-10)
+
+
+def test_exponential_inverse_needs_monotonic_altitudes():
+    with pytest.raises(ValueError):
+        exponential_inverse([0.0, 1.0, 1.0], 1.0, 1.0)
@@ -0,0 +1,33 @@
+import numpy as np
+
+from simulation_package.covariance import exponential
+from simulation_package.ensemble import ensemble_batches, temperature_ensemble
+
+Z = np.linspace(0, 60e3, 30)
+MEAN = np.linspace(280, 220, 30)
+
+
+def test_batches_do_not_depend_on_batch_size():
+    covariance = exponential(Z, 4.0, 5e3)
+    batches = list(ensemble_batches(MEAN, covariance, n=10, batch_size=3, seed=1))
+    assert [len(batch) for batch in batches] == [3, 3, 3, 1]
+    np.testing.assert_allclose(np.concatenate(batches), temperature_ensemble(MEAN, covariance, n=10, seed=1))
+
+
+def test_batches_are_drawn_lazily():
+    batches = ensemble_batches(MEAN, exponential(Z, 4.0, 5e3), n=10**9, batch_size=2, seed=0)
+    assert next(batches).shape == (2, len(MEAN))
+
+
+def test_ensemble_statistics():
+    covariance = exponential(Z, 4.0, 5e3).toarray()
+    profiles = temperature_ensemble(MEAN, covariance, n=20000, seed=2)
+    np.testing.assert_allclose(profiles.mean(axis=0), MEAN, atol=0.1)
+    np.testing.assert_allclose(np.cov(profiles, rowvar=False), covariance, atol=0.25)
+
+
+def test_semi_definite_covariance():
+    covariance = np.full((len(MEAN), len(MEAN)), 4.0)  # rank one
+    profiles = temperature_ensemble(MEAN, covariance, n=5, seed=3)
+    assert np.all(np.isfinite(profiles))
+    np.testing.assert_allclose(profiles - profiles[:, :1], np.tile(MEAN - MEAN[0], (5, 1)), atol=1e-6)
@@ -0,0 +1,36 @@
+import numpy as np
+
+from simulation_package.frequency import adaptive_grid, interpolate, uniform_grid
+
+F0 = 233.9461e9
+
+
+def test_adaptive_grid_spacing_and_ends():
+    grid = adaptive_grid(F0, half_width=300e6, df_min=50e3, df_max=5e6, core_width=3e6)
+    df = np.diff(grid)
+    assert np.all(df > 0)
+    assert np.isclose(grid[0], F0 - 300e6) and np.isclose(grid[-1], F0 + 300e6)
+    assert df.max() <= 5e6 + 1
+    assert np.allclose(df[np.abs(grid[:-1] - F0) < 3e6 - 50e3], 50e3)
+    assert np.any(np.isclose(grid, F0, rtol=0, atol=1))
+
+
+def test_adaptive_grid_symmetric_without_channels():
+    grid = adaptive_grid(F0, half_width=100e6, df_min=100e3, df_max=2e6) - F0
+    np.testing.assert_allclose(grid, -grid[::-1], atol=1)
+
+
+def test_adaptive_grid_holds_channels_at_the_core():
+    channels = uniform_grid(F0 + 7e3, half_width=20e6, flen=401)
+    grid = adaptive_grid(F0, half_width=300e6, df_min=40e3, df_max=5e6, core_width=3e6, channels=channels)
+    core = channels[np.abs(channels - F0) < 3e6]
+    assert np.all(np.isclose(grid[:, None], core[None, :], rtol=0, atol=1).any(axis=0))
+    assert np.all(np.diff(grid) > 0)
+    assert np.diff(grid)[np.abs(grid[:-1] - F0) < 2.9e6].max() <= 40e3 + 1
+
+
+def test_interpolate_linear():
+    f = np.linspace(0, 10, 11)
+    y = np.stack([2 * f, -f], axis=1)
+    f_out = np.array([0.5, 3.25, 10.0])
+    np.testing.assert_allclose(interpolate(f, y, f_out), np.stack([2 * f_out, -f_out], axis=1))
@@ -0,0 +1,56 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from simulation_package.lookup import lookup_path, set_abs_lookup, unpolarised_species
+
+SPECIES = ["O2-Z-*-233e9-234e9", "O3-*-233e9-234e9", "N2-SelfContStandardType", "H2O-PWR98"]
+F_GRID = np.linspace(233.9e9, 234.0e9, 11)
+P_GRID = np.logspace(5, 0, 20)
+T_FIELD = np.full((20, 1, 1), 250.0)
+VMR_FIELD = np.full((4, 20, 1, 1), 1e-6)
+
+
+class Workspace:
+    """Workspace stub that records the methods called on it"""
+
+    def __init__(self):
+        self.f_grid = SimpleNamespace(value=F_GRID)
+        self.p_grid = SimpleNamespace(value=P_GRID)
+        self.t_field = SimpleNamespace(value=T_FIELD)
+        self.vmr_field = SimpleNamespace(value=VMR_FIELD)
+        self.abs_lookup = "abs_lookup"
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append(name)
+
+
+def test_unpolarised_species():
+    assert unpolarised_species(SPECIES) == SPECIES[1:]
+
+
+def test_lookup_path_is_stable(root):
+    path = lookup_path(F_GRID, P_GRID, SPECIES[1:], T_FIELD, VMR_FIELD[1:])
+    assert path == lookup_path(F_GRID.copy(), list(P_GRID), list(SPECIES[1:]), T_FIELD.copy(), VMR_FIELD[1:].copy())
+    assert path.parent == root / "assets" / "abs_lookup"
+
+    for changed in (
+        lookup_path(F_GRID + 1, P_GRID, SPECIES[1:], T_FIELD, VMR_FIELD[1:]),
+        lookup_path(F_GRID, P_GRID, SPECIES, T_FIELD, VMR_FIELD[1:]),
+        lookup_path(F_GRID, P_GRID, SPECIES[1:], T_FIELD + 1, VMR_FIELD[1:]),
+        lookup_path(F_GRID, P_GRID, SPECIES[1:], T_FIELD, 2 * VMR_FIELD[1:]),
+        lookup_path(F_GRID, P_GRID, SPECIES[1:], T_FIELD, VMR_FIELD[1:], t_pert=np.arange(-10.0, 11, 10)),
+    ):
+        assert changed != path
+
+
+def test_existing_table_is_read(root):
+    # the key only holds the unpolarised species and their VMRs
+    path = lookup_path(F_GRID, P_GRID, SPECIES[1:], T_FIELD, VMR_FIELD[1:])
+    path.write_text("table")
+
+    ws = Workspace()
+    set_abs_lookup(ws, SPECIES)
+    assert ws.calls[0] == "ReadXML"
+    assert "abs_lookupCalc" not in ws.calls and "abs_lookupAdapt" in ws.calls
@@ -0,0 +1,66 @@
+import os
+
+import h5py
+import numpy as np
+
+from simulation_package.measurements import MeasurementCatalogue, scan_file
+
+
+def write_measurement(directory, time, azimuth, za=77.6):
+    date, clock = time.split("T")
+    clock = clock.replace(":", "-")
+    path = directory / f"Data_{date}_{clock}_RPGFFTS.hdf5"
+    with h5py.File(path, "w") as file:
+        group = file.create_group("kimra_data")
+        group["f"] = np.linspace(233.5e9, 234.5e9, 64)
+        group["y"] = np.zeros(64)
+        group["date"] = date
+        group["time"] = clock
+        group["azimuth"] = float(azimuth)
+        group["za"] = float(za)
+        group["integration"] = 1000
+    return path
+
+
+def test_scan_file(tmp_path):
+    path = write_measurement(tmp_path, "2024-01-04T03:35:09", azimuth=-90)
+    entry = scan_file(path)
+    assert entry["time"] == "2024-01-04T03:35:09"
+    assert (entry["azimuth"], entry["za"], entry["nchannels"]) == (-90.0, 77.6, 64)
+    assert (entry["fmin"], entry["fmax"]) == (233.5e9, 234.5e9)
+
+
+def test_query(root):
+    directory = root / "data" / "measurements"
+    (directory / "day").mkdir(parents=True)
+    write_measurement(directory / "day", "2024-01-04T05:00:00", azimuth=270)
+    write_measurement(directory / "day", "2024-01-04T03:00:00", azimuth=90)
+    write_measurement(directory, "2024-01-05T03:00:00", azimuth=-90, za=60)
+
+    catalogue = MeasurementCatalogue()
+    assert len(catalogue.entries) == 3
+    times = [entry["time"] for entry in catalogue.query(azimuth=-90)]
+    assert times == ["2024-01-04T05:00:00", "2024-01-05T03:00:00"]
+    assert len(catalogue.query(start="2024-01-04T04:00:00", end="2024-01-05T03:00:00")) == 2
+    assert len(catalogue.query(za=60)) == 1
+
+
+def test_update_scans_changed_files_only(root):
+    directory = root / "data" / "measurements"
+    directory.mkdir()
+    first = write_measurement(directory, "2024-01-04T03:00:00", azimuth=90)
+    write_measurement(directory, "2024-01-04T04:00:00", azimuth=90)
+    assert MeasurementCatalogue(update=False).update() == 2
+
+    catalogue = MeasurementCatalogue(update=False)
+    assert len(catalogue.entries) == 2
+    assert catalogue.update() == 0
+
+    write_measurement(directory, "2024-01-04T03:00:00", azimuth=-90)
+    os.utime(first, ns=(0, 0))
+    assert catalogue.update() == 1
+    assert catalogue.query(azimuth=-90)[0]["path"] == str(first)
+
+    first.unlink()
+    assert catalogue.update() == 0
+    assert len(MeasurementCatalogue(update=False).entries) == 1
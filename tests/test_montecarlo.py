@@ -0,0 +1,35 @@
+import numpy as np
+
+from simulation_package.montecarlo import FAILED, PRODUCTS, _failed, summarise
+
+
+def test_summarise_uses_converged_members():
+    rng = np.random.default_rng(0)
+    x_true = np.array([1.0, 2.0, 3.0])
+    x = x_true + 0.5 + rng.normal(scale=[1.0, 2.0, 3.0], size=(20000, 3))
+    eo = np.full(x.shape, [1.0, 2.0, 3.0])
+    ss = np.full(x.shape, 0.1)
+    converged = np.ones(len(x), dtype=bool)
+    converged[:10] = False
+    x[:10] = np.nan
+
+    summary = summarise(x, x_true, eo, ss, converged)
+    assert summary["members_used"] == len(x) - 10
+    np.testing.assert_allclose(summary["bias"], 0.5, atol=0.1)
+    np.testing.assert_allclose(summary["std_to_eo"], 1, atol=0.05)
+    np.testing.assert_allclose(summary["ss_mean"], 0.1)
+    assert summary["covariance"].shape == (3, 3)
+
+
+def test_summarise_one_element():
+    x = np.array([[1.0], [3.0]])
+    summary = summarise(x, np.array([1.0]), np.ones_like(x), np.ones_like(x), np.array([True, True]))
+    np.testing.assert_allclose(summary["covariance"], [[2.0]])
+    np.testing.assert_allclose(summary["bias"], [1.0])
+
+
+def test_failed_member():
+    member, products, log = _failed(4, np.zeros(3), "error")
+    assert member == 4 and log["status"] == FAILED and log["error"] == "error"
+    assert set(products) == set(PRODUCTS)
+    assert all(np.isnan(products[name]).all() for name in PRODUCTS)
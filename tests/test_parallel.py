@@ -0,0 +1,47 @@
+import pytest
+
+from simulation_package.parallel import JobError, iter_jobs, run_jobs
+
+
+def square(x):
+    return x * x
+
+
+def fail_odd(x):
+    if x % 2:
+        raise ValueError(f"odd {x}")
+    return x
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_iter_jobs(workers):
+    jobs = {f"job_{x}": {"x": x} for x in range(6)}
+    results = {name: (ok, value) for name, ok, value in iter_jobs(square, jobs, workers=workers)}
+    assert results == {f"job_{x}": (True, x * x) for x in range(6)}
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_iter_jobs_takes_jobs_when_needed(workers):
+    taken = []
+
+    def jobs():
+        for x in range(20):
+            taken.append(x)
+            yield f"job_{x}", {"x": x}
+
+    finished = 0
+    for name, ok, value in iter_jobs(square, jobs(), workers=workers, total=20):
+        finished += 1
+        # at most two jobs per worker are in the pool, one more is taken when a job finishes
+        assert len(taken) - finished <= 2 * workers
+    assert finished == len(taken) == 20
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run_jobs_raises_after_all_jobs(workers):
+    jobs = {f"job_{x}": {"x": x} for x in range(5)}
+    with pytest.raises(JobError) as error:
+        run_jobs(fail_odd, jobs, workers=workers)
+    assert sorted(error.value.failures) == ["job_1", "job_3"]
+    assert "odd 3" in error.value.failures["job_3"]
+    assert run_jobs(fail_odd, {"job_0": {"x": 0}, "job_2": {"x": 2}}, workers=workers) == {"job_0": 0, "job_2": 2}
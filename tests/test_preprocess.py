@@ -0,0 +1,35 @@
+import numpy as np
+
+from simulation_package.preprocess import preprocess, remove_baseline, window_bounds
+
+F0 = 233.9461e9
+
+
+def test_window_bounds():
+    f = np.arange(10.0)
+    assert window_bounds(f, 5.0, 2.0) == (4, 8)
+    assert window_bounds(f, 5.5, 2.0) == (4, 8)
+    assert window_bounds(f, 0.0, 100.0) == (0, 10)
+
+
+def test_remove_baseline():
+    f = F0 + np.linspace(-15e6, 15e6, 301)
+    line = np.exp(-(((f - F0) / 1e6) ** 2))
+    baseline = np.stack([1 + 2e-7 * (f - F0), 3 - 1e-7 * (f - F0)])
+    result = remove_baseline(f, line + baseline, F0, order=1, core_width=5e6)
+    np.testing.assert_allclose(result, [line, line], atol=1e-9)
+
+
+def test_preprocess_matches_one_spectrum_at_a_time():
+    rng = np.random.default_rng(0)
+    f = F0 + np.linspace(-50e6, 50e6, 1001)
+    y = rng.normal(size=(3, len(f)))
+    settings = {"half_width": 15e6, "trim": 20, "average": 4, "baseline": 2}
+
+    stack = preprocess(f, y, **settings)
+    assert stack["y"].shape == (3, len(stack["f"]))
+    assert np.all(np.abs(stack["f"] - F0) < 15e6)
+    for spectrum, row in zip(y, stack["y"]):
+        np.testing.assert_allclose(preprocess(f, spectrum, **settings)["y"][0], row)
+    np.testing.assert_allclose(stack["y"].min(axis=1), 0)
+    np.testing.assert_allclose(stack["y"].max(axis=1), 1)
@@ -0,0 +1,62 @@
+import h5py
+import numpy as np
+import pytest
+
+from simulation_package.store import ResultStore, index_row
+
+F_GRID = np.linspace(0, 1, 5)
+
+
+def append(store, zenith, azimuth=0.0, f_grid=F_GRID, y=None):
+    params = index_row("ycalc", "kimra", zenith, azimuth, "2024-01-04 19:00:00", True, timestamp="now")
+    data = {"y": np.full(5, zenith) if y is None else y, "iterations": zenith}
+    return store.append(params, data, {"f_grid": f_grid})
+
+
+def test_index_row():
+    row = index_row("ycalc", "kimra", 77.6, 270, "t", 1, disturbance=(3, 0.5), timestamp="now")
+    assert row["azimuth"] == -90.0
+    assert (row["disturb_index"], row["disturb_delta"], row["zeeman"]) == (3, 0.5, True)
+    assert index_row("ycalc", "kimra", 77.6, 0, "t", True)["disturb_index"] == -1
+
+
+def test_append_and_query(root):
+    with ResultStore("results.hdf5") as store:
+        rows = [append(store, zenith, azimuth) for zenith, azimuth in ((10, 90), (20, 270), (30, -90))]
+        assert rows == [0, 1, 2]
+        assert len(store) == 3
+
+        result = store.query("ycalc", "kimra", azimuth=270)
+        np.testing.assert_array_equal(result["zenith"], [20, 30])
+        np.testing.assert_array_equal(result["y"], [np.full(5, 20), np.full(5, 30)])
+        np.testing.assert_array_equal(result["f_grid"], F_GRID)
+        assert len(store.query("retrieval", "kimra")["row"]) == 0
+
+
+def test_growth_and_trim(root):
+    with ResultStore("results.hdf5") as store:
+        for zenith in range(5):
+            append(store, zenith)
+        assert store.file["ycalc/kimra/y"].shape[0] == 8
+        assert store.file["index/row"].shape[0] == 8
+        np.testing.assert_array_equal(store.index()["row"], np.arange(5))
+
+    with h5py.File(root / "data" / "simulation" / "results.hdf5", "r") as file:
+        assert file["ycalc/kimra/y"].shape == (5, 5)
+        assert file["index/row"].shape == (5,)
+
+    with ResultStore("results.hdf5") as store:
+        assert append(store, 5) == 5
+    with ResultStore("results.hdf5", mode="r") as store:
+        np.testing.assert_array_equal(store.query("ycalc", "kimra")["iterations"], np.arange(6))
+
+
+def test_mismatch_writes_nothing(root):
+    with ResultStore("results.hdf5") as store:
+        append(store, 10)
+        with pytest.raises(ValueError):
+            append(store, 20, f_grid=F_GRID + 1)
+        with pytest.raises(ValueError):
+            append(store, 20, y=np.zeros(4))
+        assert len(store) == 1
+        assert store.file["ycalc/kimra"].attrs["size"] == 1